@@ -0,0 +1,231 @@
+"""Headless page benchmark and load test for the Strategy Hub.
+
+For each register size in ``--sizes`` a fresh database is filled with
+synthetic data from ``kcca_demo`` (KPIs and weekly evaluations at the full
+size, the other registers at a tenth of it), then the app is driven with
+Streamlit's AppTest in a separate process. Recorded per size:
+
+* insert throughput: bulk loads and single-row form writes (rows/s);
+* rerun latency of every page: first render plus the median and max of
+  ``--repeat`` further reruns;
+* peak Python allocation of one traced rerun per page, and the worker's
+  peak RSS;
+* latency of each form submit handler.
+
+Results are written as JSON (``--output``). Passing an earlier report with
+``--compare`` prints the relative change of every timing.
+
+    python benchmarks/bench_pages.py --sizes 10000 100000 1000000
+    python benchmarks/bench_pages.py --sizes 10000 --compare benchmarks/results/pages-old.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "kcca_strategy_hub.py")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+FULL_SIZE_TABLES = {"kpi_data", "weekly_eval"}
+SINGLE_WRITES = 200
+# page -> (text inputs to fill, submit button)
+SUBMITS = {
+    "Strategic Plan Tracker": ({"KPI Name": "Benchmark KPI"}, "Submit KPI"),
+    "Weekly Evaluation": ({}, "Add Evaluation"),
+    "Project Management": ({"Project Title": "Benchmark project"}, "Add Project"),
+    "Risk Reporting": ({"Describe the issue or risk": "Benchmark drainage risk"}, "Submit Report"),
+    "Budget Monitoring": ({}, "Add Budget Data"),
+}
+
+sys.path.insert(0, ROOT)
+
+
+def ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+# ---------------------- WORKER (one size per process) ----------------------
+def populate(db, size):
+    from kcca_demo import SYNTHETIC
+    from kcca_store import TABLE_KEYS, HubStore
+
+    store = HubStore(db)
+    inserts = {}
+    for table, make in SYNTHETIC.items():
+        rows = size if table in FULL_SIZE_TABLES else max(size // 10, 1)
+        frame = make(rows)
+        load = store.bulk_upsert if table in TABLE_KEYS else store.append_frame
+        seconds = timed(lambda: load(table, frame))
+        inserts[f"bulk {table}"] = {"rows": rows, "seconds": round(seconds, 3), "rows_per_s": round(rows / seconds)}
+
+    risks = SYNTHETIC["risks_df"](SINGLE_WRITES, seed=1).to_dict("records")
+    seconds = timed(lambda: [store.append("risks_df", row) for row in risks])
+    inserts["append risks_df"] = {"rows": len(risks), "seconds": round(seconds, 3), "rows_per_s": round(len(risks) / seconds)}
+    kpis = SYNTHETIC["kpi_data"](SINGLE_WRITES, seed=1).to_dict("records")
+    seconds = timed(lambda: [store.upsert("kpi_data", row) for row in kpis])
+    inserts["upsert kpi_data"] = {"rows": len(kpis), "seconds": round(seconds, 3), "rows_per_s": round(len(kpis) / seconds)}
+    store.close()
+    return inserts
+
+
+def run_pages(repeat):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP, default_timeout=3600)
+    result = {"cold start": {"first_ms": ms(timed(at.run))}}
+    check(at, "cold start")
+    for page in at.sidebar.radio[0].options:
+        first = timed(lambda: at.sidebar.radio[0].set_value(page).run())
+        check(at, page)
+        reruns = [timed(at.run) for _ in range(repeat)]
+        tracemalloc.start()
+        at.run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        result[page] = {
+            "first_ms": ms(first),
+            "median_ms": ms(statistics.median(reruns)),
+            "max_ms": ms(max(reruns)),
+            "peak_alloc_mib": round(peak / 2**20, 1),
+        }
+    return at, result
+
+
+def run_submits(at):
+    result = {}
+    for page, (inputs, button) in SUBMITS.items():
+        at.sidebar.radio[0].set_value(page).run()
+        for label, value in inputs.items():
+            widgets = [w for w in [*at.text_input, *at.text_area] if w.label == label]
+            widgets[0].input(value)
+        [b for b in at.button if b.label == button][0].click()
+        result[page] = {"submit_ms": ms(timed(at.run))}
+        check(at, f"{page} submit")
+        if not at.success:
+            raise RuntimeError(f"{page}: '{button}' did not report success")
+    return result
+
+
+def check(at, where):
+    if at.exception:
+        raise RuntimeError(f"{where}: {at.exception[0].message}")
+
+
+def worker(size, repeat):
+    db = os.environ["KCCA_HUB_DB"]
+    inserts = populate(db, size)
+    at, pages = run_pages(repeat)
+    submits = run_submits(at)
+    return {
+        "size": size,
+        "inserts": inserts,
+        "pages": pages,
+        "submits": submits,
+        "max_rss_mib": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+# ---------------------- DRIVER ----------------------
+def run_size(size, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, KCCA_HUB_DB=os.path.join(tmp, "hub.db"), KCCA_HUB_BLOBS=os.path.join(tmp, "blobs"))
+        proc = subprocess.run(
+            [sys.executable, __file__, "--worker", str(size), "--repeat", str(repeat)],
+            env=env, cwd=tmp, capture_output=True, text=True,
+        )
+    if proc.returncode:
+        sys.stderr.write(proc.stderr)
+        raise SystemExit(f"benchmark for {size:,} rows failed")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def versions():
+    import pandas
+    import streamlit
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "pandas": pandas.__version__,
+        "streamlit": streamlit.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def timings(report):
+    """Flatten a report into {(size, section, name, metric): milliseconds}."""
+    flat = {}
+    for run in report["runs"]:
+        for section in ("pages", "submits"):
+            for name, metrics in run[section].items():
+                for metric, value in metrics.items():
+                    if metric.endswith("_ms"):
+                        flat[(run["size"], section, name, metric)] = value
+    return flat
+
+
+def compare(report, baseline):
+    old, new = timings(baseline), timings(report)
+    shared = sorted(new.keys() & old.keys())
+    if not shared:
+        print("\nno timings in common with the baseline (different --sizes?)")
+        return
+    print(f"\nchange vs {baseline['environment'].get('commit') or 'baseline'}:")
+    for key in shared:
+        if old[key]:
+            change = (new[key] - old[key]) / old[key] * 100
+            print(f"  {key[0]:>9,}  {key[2]:<24} {key[3]:<10} {old[key]:>10.1f} -> {new[key]:>10.1f} ms  {change:+6.1f} %")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output")
+    parser.add_argument("--compare")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.worker, args.repeat)))
+        return
+
+    report = {"generated": datetime.now().isoformat(timespec="seconds"), "environment": versions(), "runs": []}
+    for size in args.sizes:
+        run = run_size(size, args.repeat)
+        report["runs"].append(run)
+        slowest = max(run["pages"].items(), key=lambda item: item[1].get("median_ms", 0))
+        print(f"{size:>9,} rows  peak RSS {run['max_rss_mib']:.0f} MiB  slowest page {slowest[0]} ({slowest[1]['median_ms']:.0f} ms)")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"pages-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"report written to {output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Cold table loads and multi-process read throughput with the snapshot cache.
+
+Fills a temporary database with ``--rows`` synthetic KPIs and weekly
+evaluations, then:
+
+* times a cold ``HubStore.read`` in a fresh store from SQLite, and from the
+  memory-mapped Arrow snapshot that the first load publishes;
+* runs ``--processes`` worker processes (each with its own store, as app
+  workers would) that repeatedly invalidate their cache and rebuild the
+  Performance Dashboard aggregates for ``--seconds``, and reports the total
+  rebuilds per second, with and without the snapshot cache.
+
+    python benchmarks/bench_read_cache.py --rows 1000000 --processes 1 2 4
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kcca_demo import SYNTHETIC  # noqa: E402
+from kcca_store import HubStore  # noqa: E402
+
+TABLES = ["kpi_data", "weekly_eval"]
+
+
+def cold_read(db, snapshots, table, min_rows):
+    store = HubStore(db, snapshot_dir=snapshots)
+    store.read_cache.min_rows = min_rows
+    start = time.perf_counter()
+    store.read(table)
+    elapsed = time.perf_counter() - start
+    store.close()  # waits for the snapshot write
+    return elapsed
+
+
+def dashboard_worker(db, snapshots, use_cache, seconds, results):
+    store = HubStore(db, snapshot_dir=snapshots)
+    if not use_cache:
+        store.read_cache.enabled = False
+    done = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        # What another worker's write costs this one: drop the cached table
+        # and aggregates, then render the dashboard numbers again.
+        store._frames.clear()
+        store._aggregates.clear()
+        agg = store.aggregates("kpi_data")
+        agg.summary("Department")
+        agg.summary("NDP Programme")
+        done += 1
+    results.put(done)
+
+
+def throughput(db, snapshots, processes, use_cache, seconds):
+    results = mp.Queue()
+    workers = [
+        mp.Process(target=dashboard_worker, args=(db, snapshots, use_cache, seconds, results))
+        for _ in range(processes)
+    ]
+    for w in workers:
+        w.start()
+    total = sum(results.get() for _ in workers)
+    for w in workers:
+        w.join()
+    return total / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "hub.db")
+        snapshots = os.path.join(tmp, "snapshots")
+        store = HubStore(db, snapshot_dir=snapshots)
+        store.bulk_upsert("kpi_data", SYNTHETIC["kpi_data"](args.rows))
+        store.append_frame("weekly_eval", SYNTHETIC["weekly_eval"](args.rows))
+        store.close()
+
+        print(f"rows: {args.rows:,}  cpus: {os.cpu_count()}")
+        for table in TABLES:
+            from_sql = cold_read(db, snapshots, table, min_rows=0)
+            from_snapshot = cold_read(db, snapshots, table, min_rows=0)
+            print(f"cold read {table:<12} SQLite {from_sql * 1000:8.1f} ms   snapshot {from_snapshot * 1000:8.1f} ms")
+
+        for processes in args.processes:
+            without = throughput(db, snapshots, processes, False, args.seconds)
+            with_cache = throughput(db, snapshots, processes, True, args.seconds)
+            print(f"{processes} processes: dashboard rebuilds/s  SQLite {without:7.2f}   snapshot {with_cache:7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Memory and groupby cost of the schema dtypes versus plain object columns.
+
+Builds a synthetic KPI/risk-style table of ``--rows`` rows (default 1M) with
+every fixed-vocabulary column as strings, then again after ``apply_schema``,
+and prints the deep memory usage and a Department groupby timing for both.
+
+    python benchmarks/bench_schema_memory.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kcca_schema import (  # noqa: E402
+    ALL_DEPARTMENTS,
+    KCCA_DIRECTORATES,
+    KPI_STATUSES,
+    NDP_PROGRAMMES,
+    apply_schema,
+)
+
+
+def make_object_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    days = rng.integers(0, 5 * 365, rows)
+    frame = pd.DataFrame({
+        "Directorate": np.array(KCCA_DIRECTORATES, dtype=object)[rng.integers(0, len(KCCA_DIRECTORATES), rows)],
+        "Department": np.array(ALL_DEPARTMENTS, dtype=object)[rng.integers(0, len(ALL_DEPARTMENTS), rows)],
+        "KPI": [f"KPI {i}" for i in range(rows)],
+        "Target": np.full(rows, 100),
+        "Current": rng.integers(0, 101, rows),
+        "Status": np.array(KPI_STATUSES, dtype=object)[rng.integers(0, len(KPI_STATUSES), rows)],
+        "NDP Programme": np.array(NDP_PROGRAMMES, dtype=object)[rng.integers(0, len(NDP_PROGRAMMES), rows)],
+        "Week": (np.datetime64("2020-01-06") + days.astype("timedelta64[D]")).astype(str).astype(object),
+    })
+    return frame.astype({c: object for c in frame.columns if frame[c].dtype != np.int64})
+
+
+def measure(frame):
+    mem = frame.memory_usage(deep=True).sum()
+    start = time.perf_counter()
+    frame.groupby("Department", observed=True)["Current"].mean()
+    frame[frame["Status"] == "Red"].sort_values("Week")
+    return mem, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    plain = make_object_frame(args.rows)
+    typed = apply_schema("kpi_data", plain)
+    typed["Week"] = pd.to_datetime(plain["Week"])
+
+    plain_mem, plain_time = measure(plain)
+    typed_mem, typed_time = measure(typed)
+    print(f"rows:            {args.rows:,}")
+    print(f"object columns:  {plain_mem / 2**20:8.1f} MiB  groupby+filter+sort {plain_time:.3f}s")
+    print(f"schema dtypes:   {typed_mem / 2**20:8.1f} MiB  groupby+filter+sort {typed_time:.3f}s")
+    print(f"memory saved:    {(1 - typed_mem / plain_mem) * 100:8.1f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""Cold-start and first-paint timings of the Strategy Hub, checked against a budget.
+
+Each sample is a fresh Python process (a cold app worker) opening an existing
+database with the app's demo data, or with ``--rows`` synthetic rows per
+register. Recorded per sample:
+
+* ``import_ms``: importing Streamlit, pandas and the app's modules;
+* ``first_paint_ms``: the first script run of a new session on ``--page``,
+  including store and report-scheduler setup;
+* ``second_session_ms``: the first run of another session in the same
+  process, which reuses the cached store and reference data;
+* ``page_first_paint_ms``: the first run of every other page;
+* which heavy optional modules (plotly.express, the demo fixtures) were
+  imported by the time of the first paint.
+
+The median over ``--repeat`` samples is compared with ``BUDGET_MS`` (scaled
+by ``--budget-scale`` for slower machines); the script exits with status 1
+if any timing is over budget or a lazily loaded module was imported by a page
+that does not need it, so it can gate a CI job. Results are written as JSON.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --page "Strategic Plan Tracker" --rows 100000 --budget-scale 2
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "kcca_strategy_hub.py")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+APP_MODULES = ["kcca_blobs", "kcca_charts", "kcca_io", "kcca_jobs", "kcca_profiling", "kcca_search", "kcca_store"]
+# Loaded on demand only; a page that draws no Plotly chart must not import them.
+LAZY_MODULES = ["plotly.express", "kcca_demo"]
+PLOTLY_PAGES = {"Strategic Plan Tracker", "NDP Alignment"}
+# Median milliseconds allowed on a single-core reference machine.
+BUDGET_MS = {
+    "import_ms": 2500,
+    "first_paint_ms": 2500,
+    "second_session_ms": 1000,
+    "page_first_paint_ms": 1500,
+}
+
+sys.path.insert(0, ROOT)
+
+
+def ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+# ---------------------- WORKER (one cold process per sample) ----------------------
+def worker(page):
+    start = time.perf_counter()
+    import pandas  # noqa: F401
+    import streamlit  # noqa: F401
+    from streamlit.testing.v1 import AppTest
+
+    for name in APP_MODULES:
+        __import__(name)
+    imported = time.perf_counter() - start
+
+    def first_run(menu):
+        at = AppTest.from_file(APP, default_timeout=120)
+        at.session_state["menu"] = menu
+        began = time.perf_counter()
+        at.run()
+        if at.exception:
+            raise RuntimeError(f"{menu}: {at.exception[0].message}")
+        return at, time.perf_counter() - began
+
+    at, first_paint = first_run(page)
+    lazy_loaded = [name for name in LAZY_MODULES if name in sys.modules]
+    _, second_session = first_run(page)
+    pages = {}
+    for other in at.sidebar.radio[0].options:
+        if other != page:
+            began = time.perf_counter()
+            at.sidebar.radio[0].set_value(other).run()
+            pages[other] = ms(time.perf_counter() - began)
+    return {
+        "import_ms": ms(imported),
+        "first_paint_ms": ms(first_paint),
+        "second_session_ms": ms(second_session),
+        "page_first_paint_ms": pages,
+        "lazy_loaded_at_first_paint": lazy_loaded,
+    }
+
+
+# ---------------------- DRIVER ----------------------
+def prepare(tmp, rows):
+    """Create the database a restarted worker would find; return its environment."""
+    env = dict(os.environ, KCCA_HUB_DB=os.path.join(tmp, "hub.db"), KCCA_HUB_BLOBS=os.path.join(tmp, "blobs"))
+    script = (
+        "import sys; sys.path.insert(0, sys.argv[1]); rows = int(sys.argv[2])\n"
+        "from kcca_demo import SYNTHETIC, make_demo_kpi_data\n"
+        "from kcca_store import TABLE_KEYS, HubStore\n"
+        "store = HubStore()\n"
+        "store.seed('kpi_data', make_demo_kpi_data)\n"
+        "for table, make in SYNTHETIC.items():\n"
+        "    if rows:\n"
+        "        load = store.bulk_upsert if table in TABLE_KEYS else store.append_frame\n"
+        "        load(table, make(rows))\n"
+        "store.close()\n"
+    )
+    subprocess.run([sys.executable, "-c", script, ROOT, str(rows)], env=env, cwd=tmp, check=True)
+    return env
+
+
+def sample(env, cwd, page):
+    proc = subprocess.run(
+        [sys.executable, __file__, "--worker", page], env=env, cwd=cwd, capture_output=True, text=True,
+    )
+    if proc.returncode:
+        sys.stderr.write(proc.stderr)
+        raise SystemExit("startup sample failed")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples):
+    summary = {
+        metric: statistics.median(s[metric] for s in samples)
+        for metric in ("import_ms", "first_paint_ms", "second_session_ms")
+    }
+    pages = samples[0]["page_first_paint_ms"]
+    summary["page_first_paint_ms"] = {
+        name: statistics.median(s["page_first_paint_ms"][name] for s in samples) for name in pages
+    }
+    summary["lazy_loaded_at_first_paint"] = sorted({m for s in samples for m in s["lazy_loaded_at_first_paint"]})
+    return summary
+
+
+def over_budget(summary, page, scale):
+    """Messages for every timing over budget and every module loaded too early."""
+    problems = []
+    for metric in ("import_ms", "first_paint_ms", "second_session_ms"):
+        if summary[metric] > BUDGET_MS[metric] * scale:
+            problems.append(f"{metric} {summary[metric]:.0f} ms > {BUDGET_MS[metric] * scale:.0f} ms")
+    for name, value in summary["page_first_paint_ms"].items():
+        if value > BUDGET_MS["page_first_paint_ms"] * scale:
+            problems.append(f"first paint of {name} {value:.0f} ms > {BUDGET_MS['page_first_paint_ms'] * scale:.0f} ms")
+    allowed = {"plotly.express"} if page in PLOTLY_PAGES else set()
+    for name in summary["lazy_loaded_at_first_paint"]:
+        if name not in allowed:
+            problems.append(f"{name} was imported by the first paint of {page}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page", default="Project Management", help="page of the first paint")
+    parser.add_argument("--rows", type=int, default=0, help="synthetic rows per register (0: demo data only)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-scale", type=float, default=1.0)
+    parser.add_argument("--output")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.worker)))
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = prepare(tmp, args.rows)
+        samples = [sample(env, tmp, args.page) for _ in range(args.repeat)]
+    summary = summarize(samples)
+
+    print(f"cold start on '{args.page}' ({args.rows:,} rows per register), median of {args.repeat}:")
+    for metric in ("import_ms", "first_paint_ms", "second_session_ms"):
+        print(f"  {metric:<20} {summary[metric]:8.1f} ms   budget {BUDGET_MS[metric] * args.budget_scale:6.0f} ms")
+    for name, value in summary["page_first_paint_ms"].items():
+        print(f"  first paint {name:<28} {value:8.1f} ms")
+    print(f"  lazy modules loaded at first paint: {', '.join(summary['lazy_loaded_at_first_paint']) or 'none'}")
+
+    problems = over_budget(summary, args.page, args.budget_scale)
+    report = {
+        "generated": datetime.now().isoformat(timespec="seconds"),
+        "page": args.page,
+        "rows": args.rows,
+        "budget_ms": {k: v * args.budget_scale for k, v in BUDGET_MS.items()},
+        "summary": summary,
+        "samples": samples,
+        "problems": problems,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"startup-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"report written to {output}")
+    for problem in problems:
+        print(f"OVER BUDGET: {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Run several app worker processes behind a local reverse proxy.
+
+Each worker is a separate ``streamlit run`` on its own port, so sessions are
+spread over CPU cores instead of sharing one interpreter. All workers get the
+same environment, so they share the database, blob store and snapshot read
+cache (``KCCA_HUB_DB``, ``KCCA_HUB_BLOBS``, ``KCCA_HUB_SNAPSHOTS``). The
+snapshot cache is off in a single app process, so ``KCCA_HUB_SNAPSHOTS``
+defaults here to "<database name>_snapshots" next to the database.
+``deploy/nginx.conf`` balances them with sticky sessions.
+
+    python deploy/run_workers.py --workers 4             # ports 8501-8504
+    python deploy/run_workers.py --workers 4 --print-nginx
+
+A worker that exits is restarted; Ctrl+C or SIGTERM stops them all.
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "kcca_strategy_hub.py")
+RESTART_DELAY = 5.0
+
+
+def nginx_upstream(address, ports):
+    servers = "\n".join(f"    server {address}:{port};" for port in ports)
+    return f"upstream kcca_strategy_hub {{\n    ip_hash;\n{servers}\n}}"
+
+
+def start_worker(address, port):
+    return subprocess.Popen([
+        sys.executable, "-m", "streamlit", "run", APP,
+        "--server.address", address,
+        "--server.port", str(port),
+        "--server.headless", "true",
+        "--browser.gatherUsageStats", "false",
+    ], cwd=ROOT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--base-port", type=int, default=8501)
+    parser.add_argument("--address", default="127.0.0.1")
+    parser.add_argument("--print-nginx", action="store_true", help="print the nginx upstream block and exit")
+    args = parser.parse_args()
+    ports = [args.base_port + i for i in range(args.workers)]
+    if args.print_nginx:
+        print(nginx_upstream(args.address, ports))
+        return 0
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    db = os.environ.get("KCCA_HUB_DB", "kcca_strategy_hub.db")
+    os.environ.setdefault("KCCA_HUB_SNAPSHOTS", os.path.splitext(db)[0] + "_snapshots")
+    workers = {port: start_worker(args.address, port) for port in ports}
+    started = {port: time.monotonic() for port in ports}
+    print(f"started {len(workers)} workers on {args.address}:{ports[0]}-{ports[-1]}")
+    while not stopping:
+        time.sleep(1)
+        for port, proc in workers.items():
+            if proc.poll() is not None and time.monotonic() - started[port] >= RESTART_DELAY:
+                print(f"worker on port {port} exited with {proc.returncode}; restarting", file=sys.stderr)
+                workers[port] = start_worker(args.address, port)
+                started[port] = time.monotonic()
+
+    for proc in workers.values():
+        proc.terminate()
+    deadline = time.monotonic() + 10
+    for proc in workers.values():
+        try:
+            proc.wait(max(0.1, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""Content-addressed storage for uploaded documents.
+
+Each file is stored once on local disk under its SHA-256 digest
+(``<root>/ab/abcdef...``). Uploads are read in fixed-size chunks and new
+content is written to a temporary file that is renamed into place, so a
+half-written blob is never visible. A seekable upload is hashed before
+anything is written, so uploading the same content again only costs the
+hash.
+"""
+import hashlib
+import os
+import tempfile
+
+BLOB_DIR = os.environ.get("KCCA_HUB_BLOBS", "kcca_blobs")
+CHUNK_BYTES = 1 << 20
+
+
+def _chunks(stream):
+    return iter(lambda: stream.read(CHUNK_BYTES), b"")
+
+
+class BlobStore:
+    def __init__(self, root=BLOB_DIR):
+        self.root = root
+        os.makedirs(os.path.join(root, "tmp"), exist_ok=True)
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def put(self, stream):
+        """Store the contents of a binary ``stream``; return (digest, size, is_new)."""
+        if stream.seekable():
+            start = stream.tell()
+            sha = hashlib.sha256()
+            size = 0
+            for chunk in _chunks(stream):
+                sha.update(chunk)
+                size += len(chunk)
+            digest = sha.hexdigest()
+            if os.path.exists(self.path(digest)):
+                return digest, size, False
+            stream.seek(start)
+        sha = hashlib.sha256()
+        size = 0
+        fd, partial = tempfile.mkstemp(dir=os.path.join(self.root, "tmp"))
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in _chunks(stream):
+                    sha.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+            digest = sha.hexdigest()
+            target = self.path(digest)
+            if os.path.exists(target):
+                return digest, size, False
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(partial, target)
+            return digest, size, True
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+
+    def open(self, digest):
+        return open(self.path(digest), "rb")
+
+    def read(self, digest):
+        """Return a blob's bytes; Streamlit's download button needs the whole file in memory."""
+        with self.open(digest) as f:
+            return f.read()
@@ -0,0 +1,213 @@
+"""Budget ledger roll-ups, burn rates and year-end projections.
+
+Each row of ``budget_df`` is a posting: an approved allocation and/or an
+expenditure for one Department, Line Item and Period (month). ``BudgetCube``
+keeps the ledger summed into cells of (Directorate, Department, Line Item,
+month), built once with a vectorized groupby and then adjusted cell by cell
+on every posting. Roll-ups by any mix of those dimensions, monthly series and
+projections are vectorized groupbys over the cells, cached until the next
+posting, so their cost depends on the number of units, line items and months
+rather than on the number of postings.
+
+Periods are grouped into Uganda government fiscal years (July to June).
+Postings made before the ledger had periods or line items still count in
+unit totals, under "Unallocated" and without a period.
+"""
+import threading
+from datetime import date
+
+import pandas as pd
+
+from kcca_schema import apply_schema
+
+FISCAL_YEAR_START_MONTH = 7
+UNALLOCATED = "Unallocated"
+DIMENSIONS = ["Directorate", "Department", "Line Item", "Period"]
+# Projected spend within this fraction of budget counts as on track.
+OUTLOOK_TOLERANCE = 0.05
+# Writes of more rows than this (bulk imports) are folded in with one groupby.
+BULK_ROWS = 64
+
+
+def month_start(value):
+    """First day of ``value``'s month as a Timestamp, or None for a missing date."""
+    if value is None or pd.isna(value):
+        return None
+    return pd.Timestamp(value).to_period("M").start_time
+
+
+def fiscal_year(period):
+    """Calendar year in which the fiscal year containing ``period`` starts."""
+    return period.year if period.month >= FISCAL_YEAR_START_MONTH else period.year - 1
+
+
+def fiscal_year_label(year):
+    return f"FY{year}/{(year + 1) % 100:02d}"
+
+
+def fiscal_months(year):
+    return pd.date_range(f"{year}-{FISCAL_YEAR_START_MONTH:02d}-01", periods=12, freq="MS")
+
+
+def months_elapsed(year, as_of=None):
+    """Months of fiscal ``year`` begun by ``as_of`` (default today), between 1 and 12."""
+    as_of = month_start(as_of or date.today())
+    months = (as_of.year - year) * 12 + as_of.month - FISCAL_YEAR_START_MONTH + 1
+    return min(max(months, 1), 12)
+
+
+def with_rates(frame):
+    """Add Variance (budget left) and Burn % (share of budget spent) columns."""
+    frame["Variance"] = frame["Budget"] - frame["Expenditure"]
+    frame["Burn %"] = (frame["Expenditure"] / frame["Budget"].where(frame["Budget"] > 0) * 100).round(1)
+    return frame
+
+
+class BudgetCube:
+    """Incrementally maintained ledger cube for the ``budget_df`` table.
+
+    Registered as the store aggregate for ``budget_df``: rebuilt when the
+    table changes outside this process and fed each posting on write.
+    """
+
+    def __init__(self, version, frame):
+        self.version = version
+        self.cells = {}  # (directorate, department, line item, month) -> [budget, expenditure, postings]
+        self._views = {}
+        self._lock = threading.RLock()
+        if len(frame):
+            self._fold(frame, 1)
+
+    def _fold(self, frame, sign):
+        """Add (or with ``sign`` -1 remove) every posting of ``frame`` in one groupby."""
+        keyed = frame.assign(**{
+            "Line Item": frame["Line Item"].fillna(UNALLOCATED).replace("", UNALLOCATED),
+            "Period": frame["Period"].dt.to_period("M").dt.start_time,
+        })
+        grouped = keyed.groupby(DIMENSIONS, observed=True, dropna=False)
+        built = pd.DataFrame({
+            "budget": grouped["Budget"].sum(),
+            "expenditure": grouped["Expenditure"].sum(),
+            "postings": grouped.size(),
+        })
+        for (d, dept, item, month), (b, e, n) in zip(built.index, built.itertuples(index=False, name=None)):
+            key = (d, dept, item, None if pd.isna(month) else month)
+            cell = self.cells.setdefault(key, [0.0, 0.0, 0])
+            cell[0] += sign * float(b)
+            cell[1] += sign * float(e)
+            cell[2] += sign * int(n)
+            if cell[2] <= 0:
+                del self.cells[key]
+
+    def apply(self, rows, sign):
+        with self._lock:
+            self._views.clear()
+            if len(rows) > BULK_ROWS:
+                self._fold(apply_schema("budget_df", pd.DataFrame(rows)), sign)
+                return
+            for row in rows:
+                item = row.get("Line Item")
+                key = (
+                    row["Directorate"],
+                    row["Department"],
+                    UNALLOCATED if item is None or pd.isna(item) or item == "" else item,
+                    month_start(row.get("Period")),
+                )
+                cell = self.cells.setdefault(key, [0.0, 0.0, 0])
+                for i, col in enumerate(("Budget", "Expenditure")):
+                    value = row.get(col)
+                    if value is not None and not pd.isna(value):
+                        cell[i] += sign * float(value)
+                cell[2] += sign
+                if cell[2] <= 0:
+                    del self.cells[key]
+
+    def _view(self, key, build):
+        with self._lock:
+            if key not in self._views:
+                self._views[key] = build()
+            return self._views[key]
+
+    # ---------- reads ----------
+    def frame(self):
+        """One row per cell with its Budget, Expenditure, Postings and Fiscal Year."""
+        def build():
+            keys = list(self.cells)
+            values = list(self.cells.values())
+            cells = pd.DataFrame(keys, columns=DIMENSIONS)
+            cells["Period"] = pd.to_datetime(cells["Period"])
+            cells["Budget"] = pd.Series([v[0] for v in values], dtype=float)
+            cells["Expenditure"] = pd.Series([v[1] for v in values], dtype=float)
+            cells["Postings"] = pd.Series([v[2] for v in values], dtype=int)
+            period = cells["Period"]
+            cells["Fiscal Year"] = (period.dt.year - (period.dt.month < FISCAL_YEAR_START_MONTH)).astype("Int64")
+            return cells
+        return self._view("frame", build)
+
+    def fiscal_years(self):
+        """Fiscal years with postings, most recent first."""
+        years = self.frame()["Fiscal Year"].dropna().unique()
+        return sorted((int(y) for y in years), reverse=True)
+
+    def _cells(self, year):
+        cells = self.frame()
+        return cells if year is None else cells[cells["Fiscal Year"] == year]
+
+    def rollup(self, by, year=None):
+        """Budget, Expenditure, Postings, Variance and Burn % per group of ``by``.
+
+        ``year`` limits the roll-up to one fiscal year; by default every
+        posting counts, including those without a period.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+
+        def build():
+            cells = self._cells(year)
+            summed = cells.groupby(by, observed=True)[["Budget", "Expenditure", "Postings"]].sum()
+            return with_rates(summed)
+        return self._view(("rollup", tuple(by), year), build)
+
+    def monthly(self, year, by=None):
+        """Month-indexed totals over fiscal ``year`` with cumulative columns.
+
+        With ``by`` (a dimension) the result has one column per group member
+        holding its expenditure instead.
+        """
+        def build():
+            cells = self._cells(year)
+            months = fiscal_months(year)
+            if by:
+                spent = cells.pivot_table(index="Period", columns=by, values="Expenditure", aggfunc="sum", observed=True)
+                return spent.reindex(months, fill_value=0.0).fillna(0.0).rename_axis("Period")
+            series = cells.groupby("Period")[["Budget", "Expenditure"]].sum().reindex(months, fill_value=0.0)
+            series["Cumulative Budget"] = series["Budget"].cumsum()
+            series["Cumulative Expenditure"] = series["Expenditure"].cumsum()
+            return series.rename_axis("Period")
+        return self._view(("monthly", year, by), build)
+
+    def outlook(self, by, year, as_of=None):
+        """Burn rate and projected year-end spend per group of ``by`` for fiscal ``year``.
+
+        The monthly burn rate is expenditure posted up to ``as_of`` (default
+        today) divided by the fiscal months elapsed by then; projected spend
+        extends it over the year and is compared with the year's budget.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        as_of = month_start(as_of or date.today())
+        elapsed = months_elapsed(year, as_of)
+
+        def build():
+            cells = self._cells(year)
+            spent = cells["Expenditure"].where(cells["Period"] <= as_of, 0.0)
+            grouped = cells.assign(**{"Spent to Date": spent}).groupby(by, observed=True)
+            out = grouped[["Budget", "Spent to Date"]].sum()
+            out["Monthly Burn"] = out["Spent to Date"] / elapsed
+            out["Projected Spend"] = out["Monthly Burn"] * 12
+            out["Projected Variance"] = out["Budget"] - out["Projected Spend"]
+            ratio = out["Projected Spend"] / out["Budget"].where(out["Budget"] > 0)
+            out["Outlook"] = "On track"
+            out.loc[ratio > 1 + OUTLOOK_TOLERANCE, "Outlook"] = "Overspend"
+            out.loc[ratio < 1 - OUTLOOK_TOLERANCE, "Outlook"] = "Underspend"
+            out.loc[ratio.isna() & out["Projected Spend"].gt(0), "Outlook"] = "Unbudgeted"
+            return out.sort_values("Projected Variance")
+        return self._view(("outlook", tuple(by), year, as_of), build)
@@ -0,0 +1,75 @@
+"""Chart builders that keep figure size bounded as the registers grow.
+
+The functions here are pure: they take a DataFrame and view parameters and
+return a figure or series. The app caches their results by table version and
+view parameters, so a figure is only rebuilt when the data or the view changes.
+Above ``max_points`` the KPI chart switches to the top KPIs plus an "Other"
+bar, and weekly trend series are resampled to monthly means.
+
+plotly.express is imported on first use, so pages without Plotly charts do
+not pay for it.
+"""
+import os
+
+import pandas as pd
+
+CHART_MAX_POINTS = int(os.environ.get("KCCA_HUB_CHART_POINTS", "200"))
+KPI_STATUS_COLORS = {"Green": "#34c759", "Amber": "#ffd60a", "Red": "#ff3b30", "Other": "#8e8e93"}
+
+
+def top_kpis(kpi_data, max_points):
+    """Keep the ``max_points - 1`` KPIs with the highest Current and fold the rest into one bar."""
+    if len(kpi_data) <= max_points:
+        return kpi_data, 0
+    ranked = kpi_data.sort_values("Current", ascending=False, kind="stable")
+    top = ranked.iloc[:max_points - 1]
+    rest = ranked.iloc[max_points - 1:]
+    other = pd.DataFrame([{
+        "Directorate": "(various)",
+        "Department": "(various)",
+        "KPI": f"Other ({len(rest)} KPIs)",
+        "Target": rest["Target"].mean(),
+        "Current": rest["Current"].mean(),
+        "Status": "Other",
+        "NDP Programme": "(various)",
+    }])
+    shown = pd.concat([top.astype({c: object for c in other.columns if c in top.columns}), other], ignore_index=True)
+    return shown, len(rest)
+
+
+def kpi_progress_figure(kpi_data, max_points=CHART_MAX_POINTS):
+    import plotly.express as px
+
+    shown, folded = top_kpis(kpi_data, max_points)
+    title = "KPI Progress" if not folded else f"KPI Progress (top {max_points - 1} KPIs, {folded} grouped as Other)"
+    return px.bar(
+        shown,
+        x="KPI",
+        y="Current",
+        color="Status",
+        color_discrete_map=KPI_STATUS_COLORS,
+        hover_data=["Directorate", "Department", "Target", "NDP Programme"],
+        barmode="group",
+        title=title
+    )
+
+
+def ndp_fulfillment_figure(ndp_fulfillment):
+    import plotly.express as px
+
+    return px.bar(
+        ndp_fulfillment,
+        x="NDP Programme",
+        y="Fulfillment %",
+        title="NDP Programme Fulfillment (%)"
+    )
+
+
+def trend_series(trend, max_points=CHART_MAX_POINTS):
+    """Week-indexed trend columns, resampled to monthly means above ``max_points`` weeks.
+
+    Returns ``(frame, resampled)``.
+    """
+    if len(trend) <= max_points:
+        return trend, False
+    return trend.resample("MS").mean().dropna(how="all"), True
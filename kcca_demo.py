@@ -0,0 +1,150 @@
+"""Demo and synthetic data for the KCCA Strategy Hub.
+
+``make_demo_kpi_data`` is the small set of example KPIs written to a fresh
+database. The ``make_synthetic_*`` generators build register frames of any
+size with valid directorate/department pairs and vocabulary values, for
+benchmarks and load tests:
+
+    frames = {table: make(100_000) for table, make in SYNTHETIC.items()}
+"""
+import numpy as np
+import pandas as pd
+
+from kcca_schema import (
+    BUDGET_LINE_ITEMS,
+    DIRECTORATE_DEPTS_MAP,
+    ED_DEPARTMENTS,
+    KCCA_DIRECTORATES,
+    KPI_STATUSES,
+    NDP_PROGRAMMES,
+    PROJECT_STATUSES,
+    URGENCY_LEVELS,
+    apply_schema,
+)
+
+UNITS = [(d, dept) for d, depts in DIRECTORATE_DEPTS_MAP.items() for dept in depts]
+ISSUE_WORDS = [
+    "drainage", "flooding", "road", "market", "school", "waste", "permit", "revenue",
+    "audit", "traffic", "clinic", "procurement", "delay", "staffing", "funding", "land",
+]
+
+
+def make_demo_kpi_data():
+    demo = []
+    status_cycle = ["Green", "Amber", "Red", "Green"]
+    ndp_cycle = NDP_PROGRAMMES * 3
+    idx = 0
+    # Office of the Executive Director
+    for dept in ED_DEPARTMENTS:
+        demo.append({
+            "Directorate": "Office of the Executive Director",
+            "Department": dept,
+            "KPI": f"{dept} KPI Example",
+            "Target": 100,
+            "Current": 90-idx*5,
+            "Status": status_cycle[idx % len(status_cycle)],
+            "NDP Programme": ndp_cycle[idx % len(ndp_cycle)]
+        })
+        idx += 1
+    for dir_name in [d for d in KCCA_DIRECTORATES if d != "Office of the Executive Director"]:
+        demo.append({
+            "Directorate": dir_name,
+            "Department": dir_name,
+            "KPI": f"{dir_name} KPI Example",
+            "Target": 100,
+            "Current": 85-idx*4,
+            "Status": status_cycle[idx % len(status_cycle)],
+            "NDP Programme": ndp_cycle[idx % len(ndp_cycle)]
+        })
+        idx += 1
+    return demo
+
+
+# ---------------------- SYNTHETIC REGISTERS ----------------------
+def _units(rng, rows):
+    picked = rng.integers(0, len(UNITS), rows)
+    return {
+        "Directorate": np.array([u[0] for u in UNITS], dtype=object)[picked],
+        "Department": np.array([u[1] for u in UNITS], dtype=object)[picked],
+    }
+
+
+def _choice(rng, values, rows):
+    return np.array(values, dtype=object)[rng.integers(0, len(values), rows)]
+
+
+def _days(rng, rows, start="2020-01-01", span=5 * 365):
+    return np.datetime64(start) + rng.integers(0, span, rows).astype("timedelta64[D]")
+
+
+def make_synthetic_kpis(rows, seed=0):
+    """``rows`` KPIs with unique keys; Status follows Current against Target."""
+    rng = np.random.default_rng(seed)
+    current = rng.integers(0, 121, rows)
+    frame = pd.DataFrame({
+        **_units(rng, rows),
+        "KPI": [f"KPI {i}" for i in range(rows)],
+        "Target": np.full(rows, 100),
+        "Current": current,
+        "Status": np.select([current >= 90, current >= 60], KPI_STATUSES[:2], KPI_STATUSES[2]),
+        "NDP Programme": _choice(rng, NDP_PROGRAMMES, rows),
+    })
+    return apply_schema("kpi_data", frame)
+
+
+def make_synthetic_weekly_evals(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    weeks = np.datetime64("2020-01-06") + 7 * rng.integers(0, 5 * 52, rows).astype("timedelta64[D]")
+    frame = pd.DataFrame({**_units(rng, rows), "Week": weeks, "Score": rng.integers(40, 101, rows)})
+    return apply_schema("weekly_eval", frame)
+
+
+def make_synthetic_projects(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        **_units(rng, rows),
+        "Project": [f"Project {i}" for i in range(rows)],
+        "NDP Programme": _choice(rng, NDP_PROGRAMMES, rows),
+        "Status": _choice(rng, PROJECT_STATUSES, rows),
+        "Due Date": _days(rng, rows),
+        "Status Updated": _days(rng, rows),
+    })
+    return apply_schema("projects_df", frame)
+
+
+def make_synthetic_risks(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    words = _choice(rng, ISSUE_WORDS, rows * 3).reshape(rows, 3)
+    frame = pd.DataFrame({
+        **_units(rng, rows),
+        "Issue": [" ".join(w) for w in words],
+        "Urgency": _choice(rng, URGENCY_LEVELS, rows),
+        "Date": _days(rng, rows),
+    })
+    return apply_schema("risks_df", frame)
+
+
+def make_synthetic_budget(rows, seed=0):
+    """``rows`` ledger postings spread over line items and the months of five years."""
+    rng = np.random.default_rng(seed)
+    budget = rng.integers(1, 1000, rows) * 1_000_000
+    expenditure = (budget * rng.uniform(0, 1, rows)).astype("int64")
+    months = np.datetime64("2020-07", "M") + rng.integers(0, 60, rows).astype("timedelta64[M]")
+    frame = pd.DataFrame({
+        **_units(rng, rows),
+        "Line Item": _choice(rng, BUDGET_LINE_ITEMS, rows),
+        "Period": months.astype("datetime64[D]"),
+        "Budget": budget,
+        "Expenditure": expenditure,
+        "Variance": budget - expenditure,
+    })
+    return apply_schema("budget_df", frame)
+
+
+SYNTHETIC = {
+    "kpi_data": make_synthetic_kpis,
+    "weekly_eval": make_synthetic_weekly_evals,
+    "projects_df": make_synthetic_projects,
+    "risks_df": make_synthetic_risks,
+    "budget_df": make_synthetic_budget,
+}
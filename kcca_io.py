@@ -0,0 +1,281 @@
+"""Bulk import and export of the hub registers.
+
+Files are read in chunks of ``CHUNK_ROWS`` rows. Each chunk is validated with
+vectorized checks against the schema vocabularies and
+``DIRECTORATE_DEPTS_MAP``; valid rows are written in one transaction per chunk
+and invalid rows are collected into a single error report. Exports stream the
+table out of SQLite chunk by chunk into CSV or Parquet.
+
+The module can also be run from the command line:
+
+    python kcca_io.py import kpi_data q3_kpis.csv
+    python kcca_io.py export risks_df risks.parquet
+"""
+import argparse
+import contextlib
+import glob
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+from kcca_schema import (
+    DATE,
+    DATETIME,
+    DIRECTORATE_DEPTS_MAP,
+    INTEGER,
+    SCHEMAS,
+    TEXT,
+    apply_schema,
+)
+from kcca_store import DB_PATH, TABLE_KEYS, HubStore, columns
+
+CHUNK_ROWS = 50_000
+IMPORT_FORMATS = ["csv", "xlsx", "parquet"]
+EXPORT_FORMATS = ["csv", "parquet"]
+# Exported versions kept per table and format in the export directory.
+KEEP_EXPORTS = 2
+
+VALID_UNITS = pd.MultiIndex.from_tuples(
+    [(d, dept) for d, depts in DIRECTORATE_DEPTS_MAP.items() for dept in depts],
+    names=["Directorate", "Department"],
+)
+
+# Free-text columns that may be left empty; all other text columns are required.
+OPTIONAL_TEXT = {"Notes"}
+
+
+class ImportReport:
+    """Outcome of a bulk import: row counts plus one line per rejected row."""
+
+    def __init__(self):
+        self.rows_read = 0
+        self.rows_loaded = 0
+        # loaded rows that replaced an existing row with the same key
+        self.rows_updated = 0
+        self._errors = []
+
+    @property
+    def errors(self):
+        if not self._errors:
+            return pd.DataFrame(columns=["Row", "Error"])
+        return pd.concat(self._errors, ignore_index=True)
+
+    @property
+    def rows_rejected(self):
+        return self.rows_read - self.rows_loaded
+
+
+# ---------------------- READING ----------------------
+def _excel_chunks(file, chunk_rows):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("Excel import needs the 'openpyxl' package; upload CSV or Parquet instead.")
+    sheet = load_workbook(file, read_only=True, data_only=True).active
+    rows = sheet.iter_rows(values_only=True)
+    header = [str(h) for h in next(rows, ())]
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == chunk_rows:
+            yield pd.DataFrame(batch, columns=header)
+            batch = []
+    if batch:
+        yield pd.DataFrame(batch, columns=header)
+
+
+def iter_file_chunks(file, name, chunk_rows=CHUNK_ROWS, text_columns=()):
+    """Yield DataFrames of at most ``chunk_rows`` rows from a CSV/XLSX/Parquet file.
+
+    CSV ``text_columns`` are read as strings rather than parsed as numbers.
+    """
+    ext = os.path.splitext(name)[1].lower().lstrip(".")
+    if ext == "csv":
+        yield from pd.read_csv(file, chunksize=chunk_rows, dtype={c: str for c in text_columns})
+    elif ext == "parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(file).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    elif ext == "xlsx":
+        yield from _excel_chunks(file, chunk_rows)
+    else:
+        raise ValueError(f"Unsupported file type '.{ext}'; use one of {', '.join(IMPORT_FORMATS)}.")
+
+
+# ---------------------- VALIDATION ----------------------
+def _derive(table, chunk):
+    if table == "budget_df" and {"Budget", "Expenditure"} <= set(chunk.columns):
+        budget = pd.to_numeric(chunk["Budget"], errors="coerce")
+        expenditure = pd.to_numeric(chunk["Expenditure"], errors="coerce")
+        chunk = chunk.assign(Variance=budget - expenditure)
+    return chunk
+
+
+def validate_chunk(table, chunk, first_row=1):
+    """Split ``chunk`` into (valid rows with schema dtypes, error frame).
+
+    ``first_row`` is the 1-based file row number of the chunk's first record
+    and is used to number rejected rows in the error frame.
+    """
+    chunk = _derive(table, chunk)
+    missing = [c for c in columns(table) if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    chunk = chunk[columns(table)].reset_index(drop=True)
+    typed = apply_schema(table, chunk)
+    checks = {}
+    for col, kind in SCHEMAS[table].items():
+        raw_missing = chunk[col].isna()
+        if isinstance(kind, pd.CategoricalDtype):
+            checks[f"unknown {col}"] = typed[col].isna() & ~raw_missing
+            checks[f"missing {col}"] = raw_missing
+        elif kind == INTEGER:
+            checks[f"{col} is not a number"] = typed[col].isna() & ~raw_missing
+            checks[f"missing {col}"] = raw_missing
+            checks[f"{col} is negative"] = typed[col].lt(0)
+        elif kind in (DATE, DATETIME):
+            checks[f"{col} is not a date"] = typed[col].isna() & ~raw_missing
+            checks[f"missing {col}"] = raw_missing
+        elif kind == TEXT and col not in OPTIONAL_TEXT:
+            checks[f"missing {col}"] = raw_missing | chunk[col].astype(str).str.strip().eq("")
+    if {"Directorate", "Department"} <= set(typed.columns):
+        units = pd.MultiIndex.from_arrays([chunk["Directorate"], chunk["Department"]])
+        checks["Department is not in Directorate"] = (
+            ~units.isin(VALID_UNITS) & typed["Directorate"].notna() & typed["Department"].notna()
+        )
+    if table in TABLE_KEYS:
+        checks["duplicate key in file"] = chunk.duplicated(list(TABLE_KEYS[table]), keep="last")
+
+    failed = pd.DataFrame(checks)
+    bad = failed.any(axis=1)
+    if not bad.any():
+        return typed, pd.DataFrame(columns=["Row", "Error"])
+    failed = failed[bad]
+    # One line per bad row listing every check it failed.
+    stacked = failed.stack()
+    stacked = stacked[stacked]
+    messages = pd.Series(stacked.index.get_level_values(1), index=stacked.index.get_level_values(0))
+    errors = messages.groupby(level=0).agg("; ".join)
+    errors = pd.DataFrame({"Row": errors.index + first_row, "Error": errors.to_numpy()})
+    return typed[~bad], errors
+
+
+# ---------------------- IMPORT / EXPORT ----------------------
+def import_file(store, table, file, name, chunk_rows=CHUNK_ROWS):
+    """Validate and load a file into ``table`` chunk by chunk; return an ImportReport."""
+    report = ImportReport()
+    text_columns = [c for c, kind in SCHEMAS[table].items() if kind == TEXT]
+    for chunk in iter_file_chunks(file, name, chunk_rows, text_columns):
+        good, errors = validate_chunk(table, chunk, first_row=report.rows_read + 1)
+        report.rows_read += len(chunk)
+        if len(errors):
+            report._errors.append(errors)
+        if good.empty:
+            continue
+        if table in TABLE_KEYS:
+            report.rows_updated += store.bulk_upsert(table, good)[1]
+        else:
+            store.append_frame(table, good)
+        report.rows_loaded += len(good)
+    return report
+
+
+def export_table(store, table, out, fmt, chunk_rows=CHUNK_ROWS):
+    """Stream ``table`` into ``out`` (a path or binary file) as CSV or Parquet."""
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for chunk in store.iter_chunks(table, chunk_rows):
+                batch = pa.Table.from_pandas(
+                    chunk, schema=writer.schema if writer else None, preserve_index=False
+                )
+                if writer is None:
+                    writer = pq.ParquetWriter(out, batch.schema)
+                writer.write_table(batch)
+            if writer is None:
+                empty = apply_schema(table, pd.DataFrame(columns=columns(table)))
+                pq.write_table(pa.Table.from_pandas(empty, preserve_index=False), out)
+        finally:
+            if writer is not None:
+                writer.close()
+    elif fmt == "csv":
+        own_file = isinstance(out, (str, os.PathLike))
+        f = open(out, "wb") if own_file else out
+        try:
+            header = True
+            for chunk in store.iter_chunks(table, chunk_rows):
+                f.write(chunk.to_csv(index=False, header=header).encode("utf-8"))
+                header = False
+            if header:
+                f.write(pd.DataFrame(columns=columns(table)).to_csv(index=False).encode("utf-8"))
+        finally:
+            if own_file:
+                f.close()
+    else:
+        raise ValueError(f"Unsupported export format '{fmt}'; use one of {', '.join(EXPORT_FORMATS)}.")
+
+
+def export_snapshot(store, table, fmt, directory=None):
+    """Export ``table`` to a file named after its database and version; return the path.
+
+    Repeated requests for an unchanged table reuse the existing file, so
+    reruns and other sessions do not export it again. Files go to
+    ``directory`` (default "<database name>_exports" next to the database)
+    and only the newest ``KEEP_EXPORTS`` of each table and format are kept.
+    """
+    directory = directory or os.path.splitext(store.path)[0] + "_exports"
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"kcca_{table}_{store.snapshot_tag(store.version(table))}.{fmt}")
+    if not os.path.exists(path):
+        fd, partial = tempfile.mkstemp(dir=directory, suffix=f".{fmt}.part")
+        os.close(fd)
+        try:
+            export_table(store, table, partial, fmt)
+            os.replace(partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        _prune_exports(directory, table, fmt)
+    return path
+
+
+def _prune_exports(directory, table, fmt):
+    files = glob.glob(os.path.join(glob.escape(directory), f"kcca_{glob.escape(table)}_*.{fmt}"))
+    files.sort(key=os.path.getmtime)
+    for old in files[:-KEEP_EXPORTS]:
+        # A session still sending it keeps reading through its open handle.
+        with contextlib.suppress(OSError):
+            os.remove(old)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import/export for the KCCA Strategy Hub.")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("table", choices=list(SCHEMAS))
+    parser.add_argument("path")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    store = HubStore(args.db)
+    if args.action == "import":
+        with open(args.path, "rb") as f:
+            report = import_file(store, args.table, f, args.path, args.chunk_rows)
+        print(f"read {report.rows_read}, loaded {report.rows_loaded}, rejected {report.rows_rejected}")
+        if report.rows_rejected:
+            report.errors.to_csv(sys.stdout, index=False)
+            return 1
+    else:
+        fmt = os.path.splitext(args.path)[1].lower().lstrip(".")
+        export_table(store, args.table, args.path, fmt, args.chunk_rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""Background computation of heavy cross-directorate reports.
+
+Reports such as NDP fulfillment by quarter scan whole registers, which is too
+slow for a page rerun once the registers are large.
+``ReportJobs`` computes them on a thread pool inside the app process and
+keeps the latest result of each as a ``Snapshot``; pages only read that
+snapshot, which is a dict lookup.
+
+A scheduler thread checks every ``REPORT_INTERVAL`` seconds whether a
+report's source tables have changed version since its snapshot and, if so,
+queues a refresh; the app also asks for stale reports to be refreshed right
+after each write. Builders stream their tables in chunks and check the job's
+cancel event between chunks, so a running job can be cancelled.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+import pandas as pd
+
+REPORT_INTERVAL = float(os.environ.get("KCCA_HUB_REPORT_INTERVAL", "10"))
+REPORT_WORKERS = int(os.environ.get("KCCA_HUB_REPORT_WORKERS", "2"))
+CHUNK_ROWS = 50_000
+ACTIVE = ("queued", "running")
+
+logger = logging.getLogger("kcca_hub.jobs")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+# ---------------------- REPORT BUILDERS ----------------------
+def _chunks(store, table, cancel, cols):
+    for chunk in store.iter_chunks(table, CHUNK_ROWS):
+        if cancel.is_set():
+            raise JobCancelled()
+        yield chunk[cols]
+
+
+def _sum_partials(partials, keys, empty_cols):
+    if not partials:
+        return pd.DataFrame(columns=keys + empty_cols)
+    return pd.concat(partials).groupby(level=list(range(len(keys))), observed=True).sum().reset_index()
+
+
+def ndp_completion_by_quarter(store, cancel):
+    """Share of projects due in each quarter that are completed, per NDP programme."""
+    partials = []
+    for chunk in _chunks(store, "projects_df", cancel, ["NDP Programme", "Status", "Due Date"]):
+        chunk = chunk.dropna()
+        chunk = chunk.assign(Quarter=chunk["Due Date"].dt.to_period("Q").astype(str), Completed=chunk["Status"].eq("Completed"))
+        grouped = chunk.groupby(["Quarter", "NDP Programme"], observed=True)["Completed"]
+        partials.append(pd.DataFrame({"Projects": grouped.size(), "Completed": grouped.sum()}))
+    report = _sum_partials(partials, ["Quarter", "NDP Programme"], ["Projects", "Completed"])
+    report["Projects Completed %"] = (report["Completed"] / report["Projects"] * 100).round(1)
+    return report.sort_values(["Quarter", "NDP Programme"], ignore_index=True)
+
+
+# report -> (source tables, builder, depends on today's date)
+REPORTS = {
+    "NDP Project Completion by Quarter": (("projects_df",), ndp_completion_by_quarter, False),
+}
+
+
+# ---------------------- SCHEDULER ----------------------
+class Snapshot:
+    def __init__(self, frame, versions, computed_at, seconds):
+        self.frame = frame
+        self.versions = versions
+        self.computed_at = computed_at
+        self.seconds = seconds
+
+
+class JobStatus:
+    def __init__(self, state="idle", trigger=None):
+        self.state = state  # idle, queued, running, done, failed or cancelled
+        self.trigger = trigger
+        self.versions = None
+        self.queued = datetime.now() if state == "queued" else None
+        self.started = None
+        self.finished = None
+        self.error = None
+        self.cancel = threading.Event()
+        self.future = None
+
+
+class ReportJobs:
+    def __init__(self, store, reports=REPORTS, interval=REPORT_INTERVAL, workers=REPORT_WORKERS):
+        self.store = store
+        self.reports = reports
+        self.interval = interval
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kcca-report")
+        self._lock = threading.Lock()
+        self._snapshots = {}
+        self._jobs = {name: JobStatus() for name in reports}
+        self._stop = threading.Event()
+        self._scheduler = threading.Thread(target=self._schedule, name="kcca-report-scheduler", daemon=True)
+        self._scheduler.start()
+
+    # ---------- reads ----------
+    def latest(self, name):
+        """The most recent Snapshot of report ``name``, or None before its first run."""
+        return self._snapshots.get(name)
+
+    def status(self, name):
+        return self._jobs[name]
+
+    def _versions(self, name):
+        return {table: self.store.version(table) for table in self.reports[name][0]}
+
+    def stale(self, name):
+        """Why the latest snapshot is out of date, or None if it is current."""
+        snapshot = self._snapshots.get(name)
+        if snapshot is None:
+            return "not computed yet"
+        versions = self._versions(name)
+        changed = [table for table, version in versions.items() if snapshot.versions[table] != version]
+        if changed:
+            return f"{', '.join(changed)} changed since it was computed"
+        if self.reports[name][2] and snapshot.computed_at.date() != date.today():
+            return "computed on an earlier day"
+        return None
+
+    # ---------- control ----------
+    def refresh(self, name, trigger="manual"):
+        """Queue a recomputation of ``name``; False if one is already queued or running."""
+        versions = self._versions(name)
+        with self._lock:
+            if self._jobs[name].state in ACTIVE:
+                return False
+            job = JobStatus("queued", trigger)
+            job.versions = versions
+            self._jobs[name] = job
+            job.future = self._pool.submit(self._run, name, job)
+        return True
+
+    def cancel(self, name):
+        """Stop a queued or running job; the previous snapshot stays in place."""
+        with self._lock:
+            job = self._jobs[name]
+            if job.state not in ACTIVE:
+                return False
+            job.cancel.set()
+            if job.future.cancel():
+                job.state = "cancelled"
+                job.finished = datetime.now()
+        return True
+
+    def refresh_stale(self, trigger="schedule"):
+        """Queue every report whose snapshot is stale.
+
+        A report whose last run failed or was cancelled is not retried until
+        its source data changes again.
+        """
+        for name in self.reports:
+            if not self.stale(name):
+                continue
+            job = self._jobs[name]
+            if job.state in ("failed", "cancelled") and job.versions == self._versions(name):
+                continue
+            self.refresh(name, trigger)
+
+    def shutdown(self):
+        self._stop.set()
+        for name in self.reports:
+            self.cancel(name)
+        self._pool.shutdown(wait=False)
+
+    # ---------- workers ----------
+    def _run(self, name, job):
+        tables, build, _ = self.reports[name]
+        with self._lock:
+            if job.cancel.is_set():
+                # Cancelled after the pool picked the job up but before it started.
+                job.state = "cancelled"
+                job.finished = datetime.now()
+                return
+            job.state = "running"
+            job.started = datetime.now()
+        # Versions are read before the data, so a write that lands mid-run
+        # leaves the snapshot marked stale rather than wrongly current.
+        job.versions = self._versions(name)
+        start = time.perf_counter()
+        try:
+            frame = build(self.store, job.cancel)
+        except JobCancelled:
+            state = "cancelled"
+        except Exception as e:
+            logger.exception("report %r failed", name)
+            job.error = f"{type(e).__name__}: {e}"
+            state = "failed"
+        else:
+            self._snapshots[name] = Snapshot(frame, job.versions, datetime.now(), time.perf_counter() - start)
+            state = "done"
+        with self._lock:
+            job.state = state
+            job.finished = datetime.now()
+
+    def _schedule(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh_stale()
+            except Exception:
+                logger.exception("report scheduler tick failed")
+            self._stop.wait(self.interval)
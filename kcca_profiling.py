@@ -0,0 +1,128 @@
+"""Opt-in timing of app reruns.
+
+Set ``KCCA_HUB_PROFILE=1`` to enable it. The app wraps its sections (store
+setup, sidebar, each page, queries, aggregations, chart builds and
+dataframe/figure serialization) in ``profiler.section(name)``; when
+profiling is off that is a no-op.
+
+While enabled, each rerun's timings are kept per session thread for the
+Admin sidebar panel and also logged as one JSON line on the
+``kcca_hub.profile`` logger. Cumulative per-section counters are kept for the
+whole process. If ``KCCA_HUB_PROFILE_PROM`` names a file, they are written to
+it in the Prometheus text format, for node_exporter's textfile collector or
+any local scraper. A ``{pid}`` in the file name is replaced by the process id.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+PROFILE_ENABLED = os.environ.get("KCCA_HUB_PROFILE", "") not in ("", "0")
+PROM_PATH = os.environ.get("KCCA_HUB_PROFILE_PROM")
+# Minimum seconds between two writes of the Prometheus file.
+PROM_INTERVAL = 5.0
+RERUN = "rerun"
+
+logger = logging.getLogger("kcca_hub.profile")
+
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Profiler:
+    def __init__(self, enabled=PROFILE_ENABLED, prom_path=PROM_PATH):
+        self.enabled = enabled
+        self.prom_path = prom_path.replace("{pid}", str(os.getpid())) if prom_path else None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._totals = {}  # section -> [calls, seconds, max seconds]
+        self._last_export = 0.0
+
+    @contextmanager
+    def section(self, name):
+        if not self.enabled:
+            yield
+            return
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._local.depth = depth
+            run = getattr(self._local, "run", None)
+            if run is not None:
+                run.append((name, depth, elapsed))
+            self._record(name, elapsed)
+
+    def _record(self, name, elapsed):
+        with self._lock:
+            totals = self._totals.setdefault(name, [0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += elapsed
+            totals[2] = max(totals[2], elapsed)
+
+    # ---------- per rerun ----------
+    def start_run(self):
+        if self.enabled:
+            self._local.run = []
+            self._local.depth = 0
+            self._local.started = time.perf_counter()
+
+    def finish_run(self, page):
+        """Close the current rerun; return its sections as [(name, depth, seconds)], total first."""
+        run = getattr(self._local, "run", None)
+        if not self.enabled or run is None:
+            return []
+        total = time.perf_counter() - self._local.started
+        self._local.run = None
+        self._record(RERUN, total)
+        logger.info(json.dumps({
+            "event": RERUN,
+            "page": page,
+            "total_ms": round(total * 1000, 2),
+            "sections": [{"name": n, "depth": d, "ms": round(s * 1000, 2)} for n, d, s in run],
+        }))
+        if self.prom_path and time.monotonic() - self._last_export >= PROM_INTERVAL:
+            self._last_export = time.monotonic()
+            self.write_prometheus(self.prom_path)
+        return [(RERUN, 0, total)] + [(n, d + 1, s) for n, d, s in run]
+
+    # ---------- process totals ----------
+    def totals(self):
+        """{section: (calls, total seconds, max seconds)} since the process started."""
+        with self._lock:
+            return {name: tuple(values) for name, values in self._totals.items()}
+
+    def prometheus_text(self):
+        metrics = [
+            ("kcca_hub_section_calls_total", "counter", "Times each section ran.", 0),
+            ("kcca_hub_section_seconds_total", "counter", "Seconds spent in each section.", 1),
+            ("kcca_hub_section_max_seconds", "gauge", "Slowest single run of each section.", 2),
+        ]
+        totals = self.totals()
+        lines = []
+        for metric, kind, help_text, field in metrics:
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+            lines += [f'{metric}{{section="{_label(name)}"}} {values[field]}' for name, values in sorted(totals.items())]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Write the counters to ``path`` atomically so a scraper never sees half a file."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, partial = tempfile.mkstemp(dir=directory, suffix=".prom.part")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(self.prometheus_text())
+            os.replace(partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+
+
+profiler = Profiler()
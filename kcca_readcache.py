@@ -0,0 +1,112 @@
+"""Cross-process read cache of table snapshots in memory-mapped Arrow files.
+
+When several app processes serve the hub (see ``deploy/``), each keeps its
+own DataFrame per table, and after a write every other process would have to
+reload the whole table from SQLite. Instead, the first process to hold a
+table's new version writes it once as an uncompressed Arrow IPC file named
+after the table and version, and the other processes memory-map that file.
+The OS page cache then holds one copy of the data for all of them.
+
+Files are written under a temporary name and renamed into place, so a reader
+never sees a partial snapshot, and a file name only ever holds the data of
+that exact version. Writes happen on a background thread, off the page
+rerun. Only the newest ``KEEP_VERSIONS`` files of a table are kept.
+
+The cache is only worth its writes when other processes read the
+snapshots, so it is enabled only when given a directory (``HubStore`` passes
+``KCCA_HUB_SNAPSHOTS``, which ``deploy/run_workers.py`` sets). pyarrow is
+optional: without it the cache is disabled and every process reads SQLite
+directly.
+"""
+import contextlib
+import glob
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# Smaller tables load from SQLite about as fast as from a snapshot.
+SNAPSHOT_MIN_ROWS = int(os.environ.get("KCCA_HUB_SNAPSHOT_MIN_ROWS", "10000"))
+KEEP_VERSIONS = 2
+
+logger = logging.getLogger("kcca_hub.readcache")
+
+
+class ReadCache:
+    def __init__(self, root=None, min_rows=SNAPSHOT_MIN_ROWS):
+        self.root = root
+        self.min_rows = min_rows
+        self.enabled = pa is not None and root is not None
+        if self.enabled:
+            os.makedirs(root, exist_ok=True)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kcca-snapshot")
+        self._lock = threading.Lock()
+        self._pending = set()
+
+    def path(self, name, tag):
+        return os.path.join(self.root, f"{name}.{tag}.arrow")
+
+    def load(self, name, tag):
+        """The DataFrame stored for (``name``, ``tag``), or None if there is none."""
+        if not self.enabled:
+            return None
+        try:
+            with pa.memory_map(self.path(name, tag), "r") as source:
+                return pa.ipc.open_file(source).read_all().to_pandas()
+        except FileNotFoundError:
+            return None
+        except (OSError, pa.ArrowInvalid):
+            logger.warning("unreadable snapshot %s", self.path(name, tag), exc_info=True)
+            return None
+
+    def publish(self, name, tag, frame):
+        """Write ``frame`` as the snapshot for (``name``, ``tag``) in the background.
+
+        Does nothing for small frames or if the snapshot already exists or is
+        being written. ``frame`` must not be modified afterwards.
+        """
+        if not self.enabled or len(frame) < self.min_rows:
+            return
+        key = (name, tag)
+        with self._lock:
+            if key in self._pending or os.path.exists(self.path(name, tag)):
+                return
+            self._pending.add(key)
+        self._writer.submit(self._write, name, tag, frame)
+
+    def _write(self, name, tag, frame):
+        try:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            fd, partial = tempfile.mkstemp(dir=self.root, suffix=".arrow.part")
+            os.close(fd)
+            try:
+                with pa.OSFile(partial, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+                os.replace(partial, self.path(name, tag))
+            finally:
+                if os.path.exists(partial):
+                    os.remove(partial)
+            self._prune(name)
+        except Exception:
+            logger.exception("could not write snapshot %s", self.path(name, tag))
+        finally:
+            with self._lock:
+                self._pending.discard((name, tag))
+
+    def _prune(self, name):
+        files = glob.glob(os.path.join(glob.escape(self.root), f"{glob.escape(name)}.*.arrow"))
+        files.sort(key=os.path.getmtime)
+        for old in files[:-KEEP_VERSIONS]:
+            # Another process may still have it mapped; POSIX keeps the data
+            # until it is unmapped, and elsewhere the file is left for later.
+            with contextlib.suppress(OSError):
+                os.remove(old)
+
+    def close(self):
+        self._writer.shutdown(wait=True)
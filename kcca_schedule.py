@@ -0,0 +1,195 @@
+"""Project schedule index for overdue, due-soon and stalled alerts.
+
+``ScheduleIndex`` keeps, for every project status, the projects' due dates as
+a sorted datetime64 array with a parallel array of row positions (into the
+frame ``HubStore.read("projects_df")`` returns) and directorate codes.
+Stalled projects are also indexed by the date their status last changed.
+"Overdue", "due in N days" and "stalled for M weeks" are then binary-search
+range lookups, and per-directorate digests are ``np.bincount`` passes over
+those ranges, so no query scans or parses the register.
+
+New projects are queued on write and merged into the sorted arrays on the
+next read. A status update drops the changed rows from the arrays and merges
+them back under their new status, so neither needs a rebuild.
+"""
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from kcca_schema import KCCA_DIRECTORATES, PROJECT_STATUSES, SCHEMAS, apply_schema
+
+OPEN_STATUSES = [s for s in PROJECT_STATUSES if s != "Completed"]
+DUE_SOON_DAYS = 14
+STALLED_WEEKS = 4
+NO_ENTRIES = (np.array([], dtype="datetime64[ns]"), np.array([], dtype=np.int64), np.array([], dtype=np.int16))
+
+
+def day(value=None):
+    """Midnight of ``value`` (default today) as datetime64[ns]."""
+    return np.datetime64(pd.Timestamp(date.today() if value is None else value).normalize().to_datetime64(), "ns")
+
+
+def _frame(rows):
+    return apply_schema("projects_df", pd.DataFrame(rows, columns=list(SCHEMAS["projects_df"])))
+
+
+class _Sorted:
+    """Dates in ascending order with the row position and directorate code of each."""
+
+    def __init__(self, dates, rows, directorates):
+        order = np.argsort(dates, kind="stable")
+        self.dates = dates[order]
+        self.rows = rows[order]
+        self.directorates = directorates[order]
+
+    def merge(self, dates, rows, directorates):
+        new = _Sorted(dates, rows, directorates)
+        at = np.searchsorted(self.dates, new.dates, side="right")
+        self.dates = np.insert(self.dates, at, new.dates)
+        self.rows = np.insert(self.rows, at, new.rows)
+        self.directorates = np.insert(self.directorates, at, new.directorates)
+
+    def drop(self, rows):
+        keep = ~np.isin(self.rows, rows)
+        self.dates, self.rows, self.directorates = self.dates[keep], self.rows[keep], self.directorates[keep]
+
+    def span(self, start=None, end=None):
+        """Index range of dates in [start, end)."""
+        lo = 0 if start is None else np.searchsorted(self.dates, start, side="left")
+        hi = len(self.dates) if end is None else np.searchsorted(self.dates, end, side="left")
+        return lo, max(lo, hi)
+
+
+class ScheduleIndex:
+    """Sorted due-date and stall-date index for the ``projects_df`` table.
+
+    Registered as the store aggregate for ``projects_df``. New rows are
+    appended, so a new row's position is the row count; rows changed in place
+    come with their positions through ``update``.
+    """
+
+    def __init__(self, version, frame):
+        self.version = version
+        self.size = 0
+        self.due = {}  # status -> _Sorted by Due Date
+        self.stalled = _Sorted(*NO_ENTRIES)  # Stalled projects by Status Updated
+        # status -> projects per directorate code
+        self.counts = {s: np.zeros(len(KCCA_DIRECTORATES), dtype=np.int64) for s in PROJECT_STATUSES}
+        self._pending = []
+        self._lock = threading.Lock()
+        self._absorb(frame)
+
+    def apply(self, rows, sign):
+        if rows:
+            with self._lock:
+                self._pending.extend(rows)
+
+    def update(self, positions, old_rows, new_rows):
+        """Re-index rows changed in place at ``positions`` from their old values to the new ones."""
+        self._materialize()
+        with self._lock:
+            old = _frame(old_rows)
+            directorates = old["Directorate"].cat.codes.to_numpy(np.int16)
+            known = directorates >= 0
+            status = old["Status"].to_numpy(object)
+            for name in PROJECT_STATUSES:
+                self.counts[name] -= np.bincount(directorates[(status == name) & known], minlength=len(KCCA_DIRECTORATES))
+            for entries in [*self.due.values(), self.stalled]:
+                entries.drop(positions)
+            self._add(_frame(new_rows), np.asarray(positions, dtype=np.int64))
+
+    def _materialize(self):
+        with self._lock:
+            if self._pending:
+                rows, self._pending = self._pending, []
+                self._absorb(_frame(rows))
+
+    def _absorb(self, frame):
+        rows = np.arange(self.size, self.size + len(frame), dtype=np.int64)
+        self.size += len(frame)
+        self._add(frame, rows)
+
+    def _add(self, frame, rows):
+        """Count and index the projects of ``frame``, at row positions ``rows``."""
+        directorates = frame["Directorate"].cat.codes.to_numpy(np.int16)
+        known = directorates >= 0
+        status = frame["Status"].to_numpy(object)
+        due = frame["Due Date"].to_numpy("datetime64[ns]")
+        updated = frame["Status Updated"].to_numpy("datetime64[ns]")
+        for name in PROJECT_STATUSES:
+            self.counts[name] += np.bincount(directorates[(status == name) & known], minlength=len(KCCA_DIRECTORATES))
+            keep = (status == name) & known & ~np.isnat(due)
+            entries = (due[keep], rows[keep], directorates[keep])
+            if name in self.due:
+                self.due[name].merge(*entries)
+            else:
+                self.due[name] = _Sorted(*entries)
+            if name == "Stalled":
+                keep = (status == name) & known & ~np.isnat(updated)
+                self.stalled.merge(updated[keep], rows[keep], directorates[keep])
+
+    # ---------- range lookups ----------
+    def _collect(self, parts):
+        """Row positions (and dates) of several index ranges, in date order."""
+        dates = np.concatenate([p.dates[lo:hi] for p, lo, hi in parts] or [NO_ENTRIES[0]])
+        rows = np.concatenate([p.rows[lo:hi] for p, lo, hi in parts] or [NO_ENTRIES[1]])
+        order = np.argsort(dates, kind="stable")
+        return rows[order], dates[order]
+
+    def overdue_ranges(self, today=None):
+        today = day(today)
+        self._materialize()
+        return [(self.due[s], *self.due[s].span(end=today)) for s in OPEN_STATUSES]
+
+    def due_soon_ranges(self, days=DUE_SOON_DAYS, today=None):
+        today = day(today)
+        self._materialize()
+        end = today + np.timedelta64(days + 1, "D")
+        return [(self.due[s], *self.due[s].span(today, end)) for s in OPEN_STATUSES]
+
+    def stalled_ranges(self, weeks=STALLED_WEEKS, today=None):
+        since = day(today) - np.timedelta64(7 * weeks, "D") + np.timedelta64(1, "D")
+        self._materialize()
+        return [(self.stalled, *self.stalled.span(end=since))]
+
+    def overdue(self, today=None):
+        """Row positions of open projects due before ``today``, most overdue first."""
+        return self._collect(self.overdue_ranges(today))[0]
+
+    def due_within(self, days=DUE_SOON_DAYS, today=None):
+        """Row positions of open projects due from ``today`` to ``days`` days later, soonest first."""
+        return self._collect(self.due_soon_ranges(days, today))[0]
+
+    def stalled_for(self, weeks=STALLED_WEEKS, today=None):
+        """Row positions of projects stalled for at least ``weeks`` weeks, longest first."""
+        return self._collect(self.stalled_ranges(weeks, today))[0]
+
+    # ---------- bulk alert pass ----------
+    def digest(self, days=DUE_SOON_DAYS, weeks=STALLED_WEEKS, today=None):
+        """Per-directorate alert counts for one day, worst slippage first."""
+        today = day(today)
+        n = len(KCCA_DIRECTORATES)
+
+        def count(ranges, weights=None):
+            return sum(
+                (np.bincount(p.directorates[lo:hi], None if weights is None else weights(p, lo, hi), minlength=n)
+                 for p, lo, hi in ranges),
+                np.zeros(n)
+            )
+
+        overdue = self.overdue_ranges(today)
+        late_days = count(overdue, lambda p, lo, hi: (today - p.dates[lo:hi]) / np.timedelta64(1, "D"))
+        digest = pd.DataFrame({
+            "Projects": sum(self.counts.values()),
+            "Open": sum(self.counts[s] for s in OPEN_STATUSES),
+            "Overdue": count(overdue),
+            f"Due in {days} Days": count(self.due_soon_ranges(days, today)),
+            "Stalled": self.counts["Stalled"],
+            f"Stalled {weeks}+ Weeks": count(self.stalled_ranges(weeks, today)),
+        }, index=pd.Index(KCCA_DIRECTORATES, name="Directorate")).astype(int)
+        digest["Slippage %"] = (digest["Overdue"] / digest["Projects"].where(digest["Projects"] > 0) * 100).round(1)
+        digest["Mean Days Late"] = (late_days / digest["Overdue"].where(digest["Overdue"] > 0)).round(1)
+        digest = digest[digest["Projects"] > 0]
+        return digest.sort_values(["Slippage %", "Overdue"], ascending=False)
@@ -0,0 +1,204 @@
+"""Reference vocabularies and column schemas for the KCCA Strategy Hub.
+
+Columns whose values come from a fixed list (directorates, departments, NDP
+programmes, statuses, urgency levels) are held as pandas Categoricals with
+fixed categories, and date columns as datetime64. SQLite keeps plain TEXT and
+INTEGER columns; ``apply_schema`` converts a frame read from it and
+``sql_value`` converts values on the way back in.
+"""
+from datetime import date, datetime
+
+import pandas as pd
+
+# ---------------------- DIRECTORATES & DEPARTMENTS ----------------------
+KCCA_DIRECTORATES = [
+    "Office of the Executive Director",
+    "Administration & Human Resource",
+    "Physical Planning",
+    "Treasury Services",
+    "Engineering & Technical Services",
+    "Public Health Services & Environment",
+    "Education & Social Services",
+    "Legal Affairs",
+    "Revenue Collection",
+    "Internal Audit",
+    "Gender, Community Services & Production",
+    "Deputy Executive Director"
+]
+
+ED_DEPARTMENTS = [
+    "Information & Communication Technology",
+    "Public & Corporate Affairs",
+    "Procurement & Disposal Unit",
+    "Research & Strategy Management"
+]
+
+DIRECTORATE_DEPTS_MAP = {
+    "Office of the Executive Director": ED_DEPARTMENTS,
+    "Administration & Human Resource": ["Administration & Human Resource"],
+    "Physical Planning": ["Physical Planning"],
+    "Treasury Services": ["Treasury Services"],
+    "Engineering & Technical Services": ["Engineering & Technical Services"],
+    "Public Health Services & Environment": ["Public Health Services & Environment"],
+    "Education & Social Services": ["Education & Social Services"],
+    "Legal Affairs": ["Legal Affairs"],
+    "Revenue Collection": ["Revenue Collection"],
+    "Internal Audit": ["Internal Audit"],
+    "Gender, Community Services & Production": ["Gender, Community Services & Production"],
+    "Deputy Executive Director": ["Deputy Executive Director"]
+}
+
+ALL_DEPARTMENTS = [dept for depts in DIRECTORATE_DEPTS_MAP.values() for dept in depts]
+
+# ---------------------- NDP III PROGRAMMES ----------------------
+NDP_PROGRAMMES = [
+    "Integrated Transport Infrastructure and Services",
+    "Sustainable Urban Development",
+    "Human Capital Development",
+    "Community Mobilization and Mindset Change",
+    "Natural Resources, Environment, Climate Change, Land and Water Management",
+    "Private Sector Development",
+    "Digital Transformation",
+    "Innovation, Technology Development",
+    "Governance and Security",
+    "Public Sector Transformation",
+    "Sustainable Energy Development",
+    "Tourism Development",
+    "Regional Development"
+]
+
+# ---------------------- STATUS VOCABULARIES ----------------------
+KPI_STATUSES = ["Green", "Amber", "Red"]
+PROJECT_STATUSES = ["Not Started", "In Progress", "Completed", "Stalled"]
+URGENCY_LEVELS = ["Low", "Medium", "High", "Critical"]
+
+# ---------------------- BUDGET LINE ITEMS ----------------------
+# Offered by the budget form; imported ledgers may use finer line items.
+BUDGET_LINE_ITEMS = [
+    "Wage",
+    "Non-Wage Recurrent",
+    "Domestic Development",
+    "External Financing",
+    "Arrears",
+]
+
+# ---------------------- COLUMN TYPES ----------------------
+DIRECTORATE = pd.CategoricalDtype(KCCA_DIRECTORATES)
+DEPARTMENT = pd.CategoricalDtype(ALL_DEPARTMENTS)
+NDP_PROGRAMME = pd.CategoricalDtype(NDP_PROGRAMMES)
+KPI_STATUS = pd.CategoricalDtype(KPI_STATUSES)
+PROJECT_STATUS = pd.CategoricalDtype(PROJECT_STATUSES)
+URGENCY = pd.CategoricalDtype(URGENCY_LEVELS, ordered=True)
+TEXT = "text"
+INTEGER = "int"
+DATE = "date"
+DATETIME = "datetime"
+
+SCHEMAS = {
+    "kpi_data": {
+        "Directorate": DIRECTORATE,
+        "Department": DEPARTMENT,
+        "KPI": TEXT,
+        "Target": INTEGER,
+        "Current": INTEGER,
+        "Status": KPI_STATUS,
+        "NDP Programme": NDP_PROGRAMME,
+    },
+    "weekly_eval": {
+        "Directorate": DIRECTORATE,
+        "Department": DEPARTMENT,
+        "Week": DATE,
+        "Score": INTEGER,
+    },
+    "projects_df": {
+        "Directorate": DIRECTORATE,
+        "Department": DEPARTMENT,
+        "Project": TEXT,
+        "NDP Programme": NDP_PROGRAMME,
+        "Status": PROJECT_STATUS,
+        "Due Date": DATE,
+        "Status Updated": DATETIME,
+    },
+    "risks_df": {
+        "Directorate": DIRECTORATE,
+        "Department": DEPARTMENT,
+        "Issue": TEXT,
+        "Urgency": URGENCY,
+        "Date": DATETIME,
+    },
+    "budget_df": {
+        "Directorate": DIRECTORATE,
+        "Department": DEPARTMENT,
+        "Line Item": TEXT,
+        "Period": DATE,
+        "Budget": INTEGER,
+        "Expenditure": INTEGER,
+        "Variance": INTEGER,
+    },
+    "documents": {
+        "Name": TEXT,
+        "Type": TEXT,
+        "Uploaded By": TEXT,
+        "Date": DATETIME,
+        "Notes": TEXT,
+        "SHA256": TEXT,
+        "Size": INTEGER,
+    },
+}
+
+
+def sql_type(kind):
+    return "INTEGER" if kind == INTEGER else "TEXT"
+
+
+def sql_value(kind, value):
+    """Convert a Python/pandas value into what SQLite stores for ``kind``."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if kind == DATE and isinstance(value, (date, datetime)):
+        return value.strftime("%Y-%m-%d")
+    if kind == DATETIME and isinstance(value, datetime):
+        return value.isoformat(timespec="seconds")
+    if kind == DATETIME and isinstance(value, date):
+        return value.isoformat()
+    if kind == INTEGER:
+        return int(value)
+    if isinstance(value, str):
+        return value
+    return value.item() if hasattr(value, "item") else value
+
+
+def sql_frame(table, frame):
+    """Vectorized ``sql_value`` over whole columns; returns an object frame."""
+    converted = {}
+    for col, kind in SCHEMAS[table].items():
+        values = frame[col]
+        if kind in (DATE, DATETIME):
+            stamps = pd.to_datetime(values, format="ISO8601", errors="coerce")
+            values = stamps.dt.strftime("%Y-%m-%d" if kind == DATE else "%Y-%m-%dT%H:%M:%S")
+        elif kind == INTEGER:
+            values = pd.to_numeric(values, errors="coerce").astype("Int64")
+        values = values.astype(object)
+        converted[col] = values.where(values.notna(), None)
+    return pd.DataFrame(converted, index=frame.index)
+
+
+def apply_schema(table, frame):
+    """Return ``frame`` with the declared dtypes of ``table`` applied."""
+    converted = {}
+    for col, kind in SCHEMAS[table].items():
+        if col not in frame.columns:
+            continue
+        values = frame[col]
+        if isinstance(kind, pd.CategoricalDtype):
+            converted[col] = values.astype(kind)
+        elif kind in (DATE, DATETIME):
+            converted[col] = pd.to_datetime(values, format="ISO8601", errors="coerce")
+        elif kind == INTEGER:
+            numbers = pd.to_numeric(values, errors="coerce")
+            converted[col] = numbers.astype("int64") if numbers.notna().all() else numbers
+        elif kind == TEXT and not isinstance(values.dtype, pd.StringDtype):
+            # Text that looks like a number (a KPI named "101") must stay text,
+            # or it no longer matches the same key read back from SQLite.
+            converted[col] = values.astype("str")
+    return frame.assign(**converted)
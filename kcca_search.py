@@ -0,0 +1,133 @@
+"""Full-text search over risks, projects and documents.
+
+A single SQLite FTS5 table (``search_index``) holds the risk ``Issue`` text,
+project titles and document names and notes. It is kept up to date by
+triggers on the source tables, so every write path (forms, bulk imports and
+other processes sharing the database) updates it incrementally in the same
+transaction. Results are ranked with BM25 and can be narrowed by kind,
+directorate and urgency.
+"""
+import re
+
+import pandas as pd
+
+# kind -> (source table, indexed text columns, urgency column)
+SOURCES = {
+    "Risk": ("risks_df", ["Issue"], "Urgency"),
+    "Project": ("projects_df", ["Project"], None),
+    "Document": ("documents", ["Name", "Notes"], None),
+}
+# Index rowids are source rowid * KIND_SLOTS + kind number, so a source row's
+# entry can be found directly when it is updated or deleted.
+KIND_SLOTS = 4
+KIND_IDS = {kind: i for i, kind in enumerate(SOURCES)}
+FACETS = {"Kind": "kind", "Directorate": "directorate", "Urgency": "urgency"}
+
+
+def fts5_available(conn):
+    try:
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp._fts5_probe USING fts5(x)")
+        conn.execute("DROP TABLE temp._fts5_probe")
+        return True
+    except Exception:
+        return False
+
+
+def _column(row, col):
+    if col is None:
+        return "NULL"
+    return f'{row}."{col}"' if row else f'"{col}"'
+
+
+def _index_values(table, kind, text_cols, urgency, row=""):
+    """SQL value list for one index entry built from a source row."""
+    rowid = f"{row}.rowid" if row else "rowid"
+    body = " || ' ' || ".join(f"coalesce({_column(row, c)}, '')" for c in text_cols)
+    has_unit = table != "documents"
+    return ", ".join([
+        f"{rowid} * {KIND_SLOTS} + {KIND_IDS[kind]}",
+        body,
+        f"'{kind}'",
+        rowid,
+        _column(row, "Directorate" if has_unit else None),
+        _column(row, "Department" if has_unit else None),
+        _column(row, urgency),
+    ])
+
+
+def install(conn):
+    """Create the index and its triggers; backfill it the first time."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'"
+    ).fetchone()
+    conn.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+        "body, kind UNINDEXED, ref UNINDEXED, directorate UNINDEXED, "
+        "department UNINDEXED, urgency UNINDEXED, tokenize = 'porter unicode61')"
+    )
+    insert_sql = "INSERT INTO search_index (rowid, body, kind, ref, directorate, department, urgency)"
+    for kind, (table, text_cols, urgency) in SOURCES.items():
+        delete_sql = f"DELETE FROM search_index WHERE rowid = OLD.rowid * {KIND_SLOTS} + {KIND_IDS[kind]}"
+        new_values = _index_values(table, kind, text_cols, urgency, row="NEW")
+        conn.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {table}_search_insert AFTER INSERT ON "{table}" '
+            f"BEGIN {insert_sql} VALUES ({new_values}); END"
+        )
+        conn.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {table}_search_delete AFTER DELETE ON "{table}" '
+            f"BEGIN {delete_sql}; END"
+        )
+        conn.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {table}_search_update AFTER UPDATE ON "{table}" '
+            f"BEGIN {delete_sql}; {insert_sql} VALUES ({new_values}); END"
+        )
+        if not exists:
+            conn.execute(f'{insert_sql} SELECT {_index_values(table, kind, text_cols, urgency)} FROM "{table}"')
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query: every word must match, as a prefix."""
+    words = re.findall(r"\w+", text or "")
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def _where(match, facets):
+    clauses, params = ["search_index MATCH ?"], [match]
+    for label, values in (facets or {}).items():
+        if values:
+            clauses.append(f"{FACETS[label]} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+    return " AND ".join(clauses), params
+
+
+def search(conn, text, facets=None, limit=50):
+    """Ranked matches as a DataFrame; empty if ``text`` has no words."""
+    match = fts_query(text)
+    columns = ["Kind", "Directorate", "Department", "Urgency", "Match", "Ref"]
+    if not match:
+        return pd.DataFrame(columns=columns)
+    where_sql, params = _where(match, facets)
+    rows = conn.execute(
+        "SELECT kind, directorate, department, urgency, "
+        "snippet(search_index, 0, '**', '**', '…', 16), ref "
+        f"FROM search_index WHERE {where_sql} ORDER BY rank LIMIT ?",
+        [*params, int(limit)],
+    ).fetchall()
+    return pd.DataFrame(rows, columns=columns)
+
+
+def facet_counts(conn, text, facets=None):
+    """{facet label: Series of match counts per value} for the current query."""
+    match = fts_query(text)
+    if not match:
+        return {}
+    where_sql, params = _where(match, facets)
+    counts = {}
+    for label, column in FACETS.items():
+        rows = conn.execute(
+            f"SELECT coalesce({column}, '(none)'), COUNT(*) FROM search_index "
+            f"WHERE {where_sql} GROUP BY 1 ORDER BY 2 DESC",
+            params,
+        ).fetchall()
+        counts[label] = pd.Series(dict(rows), name="Matches", dtype=int)
+    return counts
@@ -0,0 +1,643 @@
+"""Shared, persistent storage for the KCCA Strategy Hub.
+
+Every register lives in one SQLite database opened in WAL mode, so all browser
+sessions (and all app processes) read the same data and nothing is lost on
+restart. Pages read tables through ``HubStore.read``, which keeps a single
+DataFrame per table for the whole process and only reloads it when the table's
+version changes. Form handlers write through ``append`` and ``update_where``;
+appended rows are buffered and folded into the cached DataFrame lazily, so an
+insert never copies the table. Tables with a natural key (see ``TABLE_KEYS``)
+also keep a hash index from key to row position for O(1) upserts, and
+tables listed in ``TABLE_AGGREGATES`` keep running group totals that are
+updated on each write instead of being recomputed on every page render.
+
+When several app processes share the database (``KCCA_HUB_SNAPSHOTS`` is
+set), a table version that one process has loaded is also published to a
+``ReadCache`` of memory-mapped Arrow snapshots, so the other processes map it
+instead of reloading it from SQLite.
+"""
+import os
+import sqlite3
+import threading
+import uuid
+
+import pandas as pd
+
+import kcca_search
+from kcca_budget import BudgetCube
+from kcca_readcache import ReadCache
+from kcca_schedule import ScheduleIndex
+from kcca_schema import SCHEMAS, apply_schema, sql_frame, sql_type, sql_value
+from kcca_timeseries import WeeklyTrends
+
+DB_PATH = os.environ.get("KCCA_HUB_DB", "kcca_strategy_hub.db")
+# Set for multi-process deployments only; a single process has nobody to share snapshots with.
+SNAPSHOT_DIR = os.environ.get("KCCA_HUB_SNAPSHOTS")
+
+# Secondary indexes used by filtered/sorted page queries (see ``HubStore.page``).
+FILTER_INDEXES = [
+    ("Directorate", "Department"),
+    ("Status",),
+    ("Urgency",),
+    ("Week",),
+    ("Due Date",),
+    ("Date",),
+]
+
+# Natural keys: enforced as UNIQUE in SQLite and indexed in memory for upserts.
+TABLE_KEYS = {
+    "kpi_data": ("Directorate", "Department", "KPI"),
+    "documents": ("SHA256",),
+}
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def columns(table):
+    return list(SCHEMAS[table])
+
+
+def row_values(table, row):
+    """Tuple of SQLite values for a row dict, in column order."""
+    return tuple(sql_value(kind, row.get(c)) for c, kind in SCHEMAS[table].items())
+
+
+def records(table, frame):
+    """Yield rows of ``frame`` as tuples of SQLite values."""
+    return sql_frame(table, frame).itertuples(index=False, name=None)
+
+
+# ---------------------- APPEND BUFFER ----------------------
+class AppendBuffer:
+    """Column-wise buffer of rows appended since the cached frame was built.
+
+    Appending is O(1) per row; the rows are turned into a DataFrame and
+    concatenated onto the table in a single step the next time it is read.
+    """
+
+    def __init__(self, cols):
+        self._data = {c: [] for c in cols}
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def extend(self, rows):
+        for c, values in self._data.items():
+            values.extend(row.get(c) for row in rows)
+        self._len += len(rows)
+
+    def extend_frame(self, frame):
+        for c, values in self._data.items():
+            values.extend(frame[c].tolist())
+        self._len += len(frame)
+
+    def compact_into(self, table, frame):
+        if not self._len:
+            return frame
+        tail = apply_schema(table, pd.DataFrame(self._data))
+        self._data = {c: [] for c in self._data}
+        self._len = 0
+        if frame.empty:
+            return tail
+        tail.index = pd.RangeIndex(len(frame), len(frame) + len(tail))
+        return pd.concat([frame, tail])
+
+
+class _CachedTable:
+    def __init__(self, version, frame):
+        self.version = version
+        self.frame = frame
+        self.buffer = AppendBuffer(frame.columns)
+        # whether ``frame`` at ``version`` has been offered to the read cache
+        self.published = False
+        # key tuple -> row position in ``frame`` (plus buffered rows); built on demand
+        self.index = None
+
+
+# ---------------------- AGGREGATES ----------------------
+class KpiAggregates:
+    """Running KPI totals per Department and per NDP Programme.
+
+    Each group holds ``[sum of Current, non-null Current count, KPI count,
+    Green count]``. Totals are built once with vectorized groupbys and then
+    adjusted row by row on every write, so summaries cost O(groups) rather
+    than O(rows).
+    """
+
+    GROUPS = ("Department", "NDP Programme")
+
+    def __init__(self, version, frame):
+        self.version = version
+        self._summaries = {}
+        self.totals = {}
+        current = pd.to_numeric(frame["Current"], errors="coerce")
+        green = frame["Status"].eq("Green")
+        for group in self.GROUPS:
+            by = frame[group]
+            built = pd.DataFrame({
+                "sum": current.groupby(by, observed=True).sum(),
+                "n": current.groupby(by, observed=True).count(),
+                "size": by.groupby(by, observed=True).size(),
+                "green": green.groupby(by, observed=True).sum(),
+            })
+            self.totals[group] = {
+                name: [float(r[0]), int(r[1]), int(r[2]), int(r[3])]
+                for name, r in zip(built.index, built.itertuples(index=False, name=None))
+            }
+
+    def apply(self, rows, sign):
+        for row in rows:
+            value = row.get("Current")
+            has_value = value is not None and not pd.isna(value)
+            for group in self.GROUPS:
+                t = self.totals[group].setdefault(row[group], [0.0, 0, 0, 0])
+                if has_value:
+                    t[0] += sign * float(value)
+                    t[1] += sign
+                t[2] += sign
+                t[3] += sign * (row.get("Status") == "Green")
+                if t[2] <= 0:
+                    del self.totals[group][row[group]]
+        self._summaries.clear()
+
+    def summary(self, group):
+        """DataFrame indexed by ``group`` with mean Current, KPI count and Fulfillment %."""
+        if group not in self._summaries:
+            totals = self.totals[group]
+            names = sorted(totals)
+            sums, ns, sizes, greens = (
+                pd.Series([totals[n][i] for n in names], index=pd.Index(names, name=group), dtype=float)
+                for i in range(4)
+            )
+            self._summaries[group] = pd.DataFrame({
+                "Current": sums / ns.where(ns > 0),
+                "KPIs": sizes.astype(int),
+                "Fulfillment %": greens / sizes * 100,
+            })
+        return self._summaries[group]
+
+
+TABLE_AGGREGATES = {
+    "kpi_data": KpiAggregates,
+    "weekly_eval": WeeklyTrends,
+    "budget_df": BudgetCube,
+    "projects_df": ScheduleIndex,
+}
+
+
+# ---------------------- STORE ----------------------
+class HubStore:
+    """Repository over the SQLite database shared by all sessions.
+
+    One instance is created per process (see ``get_store`` in the app) and is
+    safe to use from the Streamlit script threads of every session.
+    """
+
+    def __init__(self, path=DB_PATH, snapshot_dir=SNAPSHOT_DIR):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._frames = {}
+        self._aggregates = {}
+        self._create_tables()
+        self.read_cache = ReadCache(snapshot_dir)
+        with self._lock, self._conn:
+            self.search_enabled = kcca_search.fts5_available(self._conn)
+            if self.search_enabled:
+                self._conn.execute("BEGIN IMMEDIATE")
+                kcca_search.install(self._conn)
+
+    def _create_tables(self):
+        with self._lock, self._conn:
+            # Hold the write lock for the whole migration, so app processes
+            # starting together do not race on ALTER TABLE or de-duplication.
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS _versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+            )
+            # Identifies this database in snapshot names, so snapshots of a
+            # deleted or replaced database are never mistaken for its own.
+            self._conn.execute("CREATE TABLE IF NOT EXISTS _meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._conn.execute(
+                "INSERT OR IGNORE INTO _meta (key, value) VALUES ('instance_id', ?)", (uuid.uuid4().hex,)
+            )
+            self.instance_id = self._conn.execute(
+                "SELECT value FROM _meta WHERE key = 'instance_id'"
+            ).fetchone()[0]
+            for table, schema in SCHEMAS.items():
+                col_sql = ", ".join(f"{quote(c)} {sql_type(k)}" for c, k in schema.items())
+                self._conn.execute(f"CREATE TABLE IF NOT EXISTS {quote(table)} ({col_sql})")
+                # Databases created by older versions may lack newer columns.
+                existing = {r[1] for r in self._conn.execute(f"PRAGMA table_info({quote(table)})")}
+                for c, k in schema.items():
+                    if c not in existing:
+                        self._conn.execute(f"ALTER TABLE {quote(table)} ADD COLUMN {quote(c)} {sql_type(k)}")
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO _versions (name, version) VALUES (?, 0)", (table,)
+                )
+            for table, schema in SCHEMAS.items():
+                for cols in FILTER_INDEXES:
+                    if all(c in schema for c in cols):
+                        name = table + "_" + "_".join(c.lower().replace(" ", "_") for c in cols)
+                        self._conn.execute(
+                            f"CREATE INDEX IF NOT EXISTS {quote(name)} ON {quote(table)} "
+                            f"({', '.join(quote(c) for c in cols)})"
+                        )
+            for table, keys in TABLE_KEYS.items():
+                if self._conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (table + "_key",)
+                ).fetchone():
+                    continue
+                key_sql = ", ".join(quote(k) for k in keys)
+                not_null_sql = " AND ".join(f"{quote(k)} IS NOT NULL" for k in keys)
+                # Databases from before the key index may hold duplicate keys; keep the latest row.
+                self._conn.execute(
+                    f"DELETE FROM {quote(table)} WHERE {not_null_sql} AND rowid NOT IN "
+                    f"(SELECT MAX(rowid) FROM {quote(table)} GROUP BY {key_sql})"
+                )
+                self._conn.execute(f"CREATE UNIQUE INDEX {quote(table + '_key')} ON {quote(table)} ({key_sql})")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+        self.read_cache.close()
+
+    # ---------- reads ----------
+    def version(self, table):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM _versions WHERE name = ?", (table,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def count(self, table):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {quote(table)}").fetchone()[0]
+
+    def read(self, table):
+        """Return the current contents of ``table``.
+
+        The DataFrame is shared by every session in the process, so callers
+        must treat it as read-only and write through the store instead.
+        """
+        with self._lock:
+            version = self.version(table)
+            cached = self._frames.get(table)
+            if cached is None or cached.version != version:
+                frame = self.read_cache.load(table, self.snapshot_tag(version))
+                mapped = frame is not None
+                if not mapped:
+                    col_sql = ", ".join(quote(c) for c in columns(table))
+                    frame = apply_schema(table, pd.read_sql_query(
+                        f"SELECT {col_sql} FROM {quote(table)} ORDER BY rowid", self._conn
+                    ))
+                cached = self._frames[table] = _CachedTable(version, frame)
+                cached.published = mapped
+            elif len(cached.buffer):
+                cached.frame = cached.buffer.compact_into(table, cached.frame)
+            if not cached.published:
+                self.read_cache.publish(table, self.snapshot_tag(cached.version), cached.frame)
+                cached.published = True
+            return cached.frame
+
+    def snapshot_tag(self, version):
+        """Name part identifying this database at ``version``, for cached files."""
+        return f"{self.instance_id[:12]}-v{version}"
+
+    def _where(self, table, filters):
+        clauses, params = [], []
+        for col, values in (filters or {}).items():
+            if values:
+                clauses.append(f"{quote(col)} IN ({', '.join('?' for _ in values)})")
+                params.extend(sql_value(SCHEMAS[table][col], v) for v in values)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def count_where(self, table, filters=None):
+        """Number of rows matching ``filters`` ({column: [allowed values]})."""
+        where_sql, params = self._where(table, filters)
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT COUNT(*) FROM {quote(table)}{where_sql}", params
+            ).fetchone()[0]
+
+    def page(self, table, filters=None, sort_by=None, descending=False, limit=50, offset=0):
+        """Return one page of ``table`` filtered and sorted inside SQLite.
+
+        Only ``limit`` rows are materialized, so the cost of showing a page
+        does not depend on the size of the table. Ordered categoricals sort by
+        their category order rather than alphabetically.
+        """
+        where_sql, params = self._where(table, filters)
+        rowid_sql = "rowid DESC" if descending else "rowid"
+        order_sql = rowid_sql
+        if sort_by:
+            kind = SCHEMAS[table][sort_by]
+            if isinstance(kind, pd.CategoricalDtype) and kind.ordered:
+                cases = " ".join(f"WHEN ? THEN {i}" for i in range(len(kind.categories)))
+                order_sql = f"CASE {quote(sort_by)} {cases} END"
+                params = [*params, *list(kind.categories)]
+            else:
+                order_sql = quote(sort_by)
+            order_sql += (" DESC" if descending else " ASC") + ", " + rowid_sql
+        col_sql = ", ".join(quote(c) for c in columns(table))
+        with self._lock:
+            frame = pd.read_sql_query(
+                f"SELECT {col_sql} FROM {quote(table)}{where_sql} ORDER BY {order_sql} LIMIT ? OFFSET ?",
+                self._conn,
+                params=[*params, int(limit), int(offset)],
+            )
+        return apply_schema(table, frame)
+
+    def search(self, text, facets=None, limit=50):
+        """Ranked full-text matches over risks, projects and documents."""
+        with self._lock:
+            return kcca_search.search(self._conn, text, facets, limit)
+
+    def search_facets(self, text, facets=None):
+        with self._lock:
+            return kcca_search.facet_counts(self._conn, text, facets)
+
+    def aggregates(self, table):
+        """Return the running aggregates for ``table``, rebuilt only if stale."""
+        with self._lock:
+            version = self.version(table)
+            agg = self._aggregates.get(table)
+            if agg is None or agg.version != version:
+                agg = TABLE_AGGREGATES[table](version, self.read(table))
+                self._aggregates[table] = agg
+            return agg
+
+    def _key_index(self, table):
+        cached = self._frames[table]
+        if cached.index is None:
+            frame = cached.frame
+            keys = zip(*(frame[k] for k in TABLE_KEYS[table]))
+            cached.index = dict(zip(keys, range(len(frame))))
+        return cached.index
+
+    # ---------- writes ----------
+    def _bump(self, table):
+        self._conn.execute("UPDATE _versions SET version = version + 1 WHERE name = ?", (table,))
+        return self._conn.execute(
+            "SELECT version FROM _versions WHERE name = ?", (table,)
+        ).fetchone()[0]
+
+    def _apply_aggregates(self, table, version, removed, added, positions=None):
+        """Feed a write to the table's aggregates if they are current.
+
+        ``positions`` are the row positions of rows updated in place
+        (``removed`` holds their old values, ``added`` their new ones), for
+        aggregates that index rows by position.
+        """
+        agg = self._aggregates.get(table)
+        if agg is not None and agg.version == version - 1:
+            if positions is not None and hasattr(agg, "update"):
+                agg.update(positions, removed, added)
+            else:
+                agg.apply(removed, -1)
+                agg.apply(added, 1)
+            agg.version = version
+
+    def append(self, table, row):
+        self.append_many(table, [row])
+
+    def append_many(self, table, rows):
+        cols = columns(table)
+        values = [row_values(table, row) for row in rows]
+        if not values:
+            return
+        placeholders = ", ".join("?" for _ in cols)
+        col_sql = ", ".join(quote(c) for c in cols)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO {quote(table)} ({col_sql}) VALUES ({placeholders})", values
+            )
+            version = self._bump(table)
+            # Only buffer when nobody else wrote since the cache was built;
+            # otherwise the next read reloads the table anyway.
+            cached = self._frames.get(table)
+            if cached is not None and cached.version == version - 1:
+                if cached.index is not None:
+                    base = len(cached.frame) + len(cached.buffer)
+                    keys = TABLE_KEYS[table]
+                    for i, row in enumerate(rows):
+                        cached.index[tuple(row[k] for k in keys)] = base + i
+                cached.buffer.extend(rows)
+                cached.version = version
+                cached.published = False
+            self._apply_aggregates(table, version, [], rows)
+
+    def append_frame(self, table, frame):
+        """Append every row of ``frame`` in one transaction (bulk imports)."""
+        if frame.empty:
+            return
+        cols = columns(table)
+        placeholders = ", ".join("?" for _ in cols)
+        col_sql = ", ".join(quote(c) for c in cols)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO {quote(table)} ({col_sql}) VALUES ({placeholders})",
+                records(table, frame),
+            )
+            version = self._bump(table)
+            cached = self._frames.get(table)
+            if cached is not None and cached.version == version - 1:
+                cached.buffer.extend_frame(frame)
+                cached.index = None
+                cached.version = version
+                cached.published = False
+            # Only build the row dicts if there are aggregates to feed.
+            if table in self._aggregates:
+                self._apply_aggregates(table, version, [], frame.to_dict("records"))
+
+    def iter_chunks(self, table, chunk_rows):
+        """Stream ``table`` in chunks of ``chunk_rows`` with schema dtypes applied.
+
+        Uses its own connection, so a long export reads a consistent WAL
+        snapshot without holding the store lock.
+        """
+        col_sql = ", ".join(quote(c) for c in columns(table))
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            for chunk in pd.read_sql_query(
+                f"SELECT {col_sql} FROM {quote(table)} ORDER BY rowid", conn, chunksize=chunk_rows
+            ):
+                yield apply_schema(table, chunk)
+        finally:
+            conn.close()
+
+    def update_where(self, table, match, values):
+        """Set ``values`` on every row equal to ``match``; return the row count.
+
+        The changed rows are patched into the cached DataFrame and fed to the
+        table's aggregates, so an update does not reload the table.
+        """
+        set_sql = ", ".join(f"{quote(c)} = ?" for c in values)
+        where_sql = " AND ".join(f"{quote(c)} = ?" for c in match)
+        with self._lock:
+            if table in self._frames:
+                self.read(table)  # fold buffered rows in before matching
+            with self._conn:
+                cur = self._conn.execute(
+                    f"UPDATE {quote(table)} SET {set_sql} WHERE {where_sql}",
+                    [sql_value(SCHEMAS[table][c], v) for c, v in [*values.items(), *match.items()]],
+                )
+                if not cur.rowcount:
+                    return 0
+                version = self._bump(table)
+            cached = self._frames.get(table)
+            if cached is None or cached.version != version - 1:
+                return cur.rowcount
+            frame = cached.frame
+            mask = pd.Series(True, index=frame.index)
+            for c, v in match.items():
+                mask &= frame[c].eq(v)
+            positions = mask.to_numpy().nonzero()[0]
+            if len(positions) != cur.rowcount:
+                # The cached frame disagrees with SQLite; reload it on the next read.
+                del self._frames[table]
+                return cur.rowcount
+            typed = apply_schema(table, pd.DataFrame([values])).iloc[0].to_dict()
+            removed = frame.iloc[positions].to_dict("records")
+            self._apply_aggregates(table, version, removed, [{**row, **typed} for row in removed], positions)
+            # Copy-on-write, as in ``upsert``: readers keep the old frame.
+            frame = cached.frame = frame.copy(deep=False)
+            for c, v in typed.items():
+                frame.iloc[positions, frame.columns.get_loc(c)] = v
+            if set(values) & set(TABLE_KEYS.get(table, ())):
+                cached.index = None
+            cached.version = version
+            cached.published = False
+            return cur.rowcount
+
+    def seed(self, table, make_rows):
+        """Fill ``table`` from ``make_rows()`` if it is empty (first start only).
+
+        The check and the insert share one write transaction, so processes
+        starting together seed the table once. A table that already has rows
+        is skipped without taking the write lock.
+        """
+        if self.count(table):
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                empty = self.count(table) == 0
+                if empty:
+                    self.append_many(table, make_rows())
+            finally:
+                if self._conn.in_transaction:
+                    self._conn.rollback()
+
+    # ---------- keyed access ----------
+    def get(self, table, key):
+        """Return the row with natural key ``key`` (a tuple) as a dict, or None."""
+        with self._lock:
+            frame = self.read(table)
+            pos = self._key_index(table).get(tuple(key))
+            return None if pos is None else frame.iloc[pos].to_dict()
+
+    def upsert(self, table, row):
+        """Insert ``row`` or update the row with the same key; True if updated.
+
+        The key lookup goes through the in-memory hash index, so the cost does
+        not grow with the size of the table.
+        """
+        keys = TABLE_KEYS[table]
+        key = tuple(row[k] for k in keys)
+        values = {c: row[c] for c in columns(table) if c not in keys}
+        with self._lock:
+            frame = self.read(table)
+            pos = self._key_index(table).get(key)
+            if pos is None:
+                try:
+                    self.append(table, row)
+                    return False
+                except sqlite3.IntegrityError:
+                    # SQLite has the key but the cached index missed it:
+                    # reload the table and update the row instead.
+                    self._frames.pop(table, None)
+                    frame = self.read(table)
+                    pos = self._key_index(table).get(key)
+                    if pos is None:
+                        raise
+            set_sql = ", ".join(f"{quote(c)} = ?" for c in values)
+            where_sql = " AND ".join(f"{quote(k)} = ?" for k in keys)
+            with self._conn:
+                self._conn.execute(
+                    f"UPDATE {quote(table)} SET {set_sql} WHERE {where_sql}",
+                    [sql_value(SCHEMAS[table][c], v) for c, v in [*values.items(), *zip(keys, key)]],
+                )
+                version = self._bump(table)
+            self._apply_aggregates(table, version, [frame.iloc[pos].to_dict()], [row])
+            cached = self._frames[table]
+            if cached.version == version - 1:
+                # Update a shallow copy: copy-on-write leaves the frame handed
+                # out to readers (and the read cache) untouched.
+                frame = cached.frame = frame.copy(deep=False)
+                for c, v in values.items():
+                    frame.iat[pos, frame.columns.get_loc(c)] = v
+                cached.version = version
+                cached.published = False
+            return True
+
+    def bulk_upsert(self, table, frame):
+        """Apply many keyed inserts/updates at once; return (inserted, updated).
+
+        Rows are written in one transaction and merged into the cached
+        DataFrame with vectorized index lookups rather than row by row.
+        Raises ValueError if any row has a missing or unknown key value.
+        """
+        keys = list(TABLE_KEYS[table])
+        cols = columns(table)
+        value_cols = [c for c in cols if c not in keys]
+        incoming = apply_schema(table, frame[cols])
+        # SQLite's UNIQUE index does not apply to NULLs, so such rows would
+        # be inserted again on every upsert.
+        no_key = incoming[keys].isna().any(axis=1)
+        if no_key.any():
+            raise ValueError(f"{int(no_key.sum())} rows have a missing or unknown {', '.join(keys)}")
+        incoming = incoming.drop_duplicates(keys, keep="last").reset_index(drop=True)
+        if incoming.empty:
+            return 0, 0
+        col_sql = ", ".join(quote(c) for c in cols)
+        placeholders = ", ".join("?" for _ in cols)
+        key_sql = ", ".join(quote(k) for k in keys)
+        set_sql = ", ".join(f"{quote(c)} = excluded.{quote(c)}" for c in value_cols)
+        with self._lock:
+            current = self.read(table)
+            cached = self._frames[table]
+            pos = pd.MultiIndex.from_frame(current[keys]).get_indexer(
+                pd.MultiIndex.from_frame(incoming[keys])
+            )
+            hit = pos >= 0
+            with self._conn:
+                self._conn.executemany(
+                    f"INSERT INTO {quote(table)} ({col_sql}) VALUES ({placeholders}) "
+                    f"ON CONFLICT ({key_sql}) DO UPDATE SET {set_sql}",
+                    records(table, incoming),
+                )
+                version = self._bump(table)
+            self._apply_aggregates(
+                table, version,
+                current.iloc[pos[hit]].to_dict("records"),
+                incoming.to_dict("records"),
+            )
+            if cached.version == version - 1:
+                merged = current.copy()
+                for c in value_cols:
+                    merged.iloc[pos[hit], merged.columns.get_loc(c)] = incoming.loc[hit, c].to_numpy()
+                added = incoming.loc[~hit]
+                if len(added):
+                    added.index = pd.RangeIndex(len(merged), len(merged) + len(added))
+                    merged = pd.concat([merged, added]) if len(merged) else added
+                cached.frame = merged
+                cached.index = None
+                cached.version = version
+                cached.published = False
+        return int((~hit).sum()), int(hit.sum())
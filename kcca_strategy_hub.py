@@ -1,9 +1,31 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import math
+import os
 from datetime import date, datetime
 
+from kcca_schema import (
+    KCCA_DIRECTORATES,
+    ED_DEPARTMENTS,
+    NDP_PROGRAMMES,
+    KPI_STATUSES,
+    PROJECT_STATUSES,
+    URGENCY_LEVELS,
+    BUDGET_LINE_ITEMS,
+    SCHEMAS
+)
+from kcca_blobs import BLOB_DIR, BlobStore
+from kcca_budget import fiscal_months, fiscal_year, fiscal_year_label
+from kcca_charts import CHART_MAX_POINTS, kpi_progress_figure, ndp_fulfillment_figure, trend_series
+from kcca_io import EXPORT_FORMATS, IMPORT_FORMATS, export_snapshot, import_file
+from kcca_jobs import ACTIVE, REPORTS, ReportJobs
+from kcca_profiling import profiler
+from kcca_schedule import DUE_SOON_DAYS, STALLED_WEEKS
+from kcca_search import SOURCES as SEARCH_SOURCES
+from kcca_store import DB_PATH, HubStore, columns
+
 # ---------------------- APP CONFIGURATION ----------------------
+profiler.start_run()
 st.set_page_config(
     page_title="KCCA Strategy Hub",
     page_icon="📊",
@@ -11,108 +33,226 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# ---------------------- DIRECTORATES & DEPARTMENTS ----------------------
-KCCA_DIRECTORATES = [
-    "Office of the Executive Director",
-    "Administration & Human Resource",
-    "Physical Planning",
-    "Treasury Services",
-    "Engineering & Technical Services",
-    "Public Health Services & Environment",
-    "Education & Social Services",
-    "Legal Affairs",
-    "Revenue Collection",
-    "Internal Audit",
-    "Gender, Community Services & Production",
-    "Deputy Executive Director"
-]
-
-ED_DEPARTMENTS = [
-    "Information & Communication Technology",
-    "Public & Corporate Affairs",
-    "Procurement & Disposal Unit",
-    "Research & Strategy Management"
-]
-
-DIRECTORATE_DEPTS_MAP = {
-    "Office of the Executive Director": ED_DEPARTMENTS,
-    "Administration & Human Resource": ["Administration & Human Resource"],
-    "Physical Planning": ["Physical Planning"],
-    "Treasury Services": ["Treasury Services"],
-    "Engineering & Technical Services": ["Engineering & Technical Services"],
-    "Public Health Services & Environment": ["Public Health Services & Environment"],
-    "Education & Social Services": ["Education & Social Services"],
-    "Legal Affairs": ["Legal Affairs"],
-    "Revenue Collection": ["Revenue Collection"],
-    "Internal Audit": ["Internal Audit"],
-    "Gender, Community Services & Production": ["Gender, Community Services & Production"],
-    "Deputy Executive Director": ["Deputy Executive Director"]
-}
+# ---------------------- SHARED DATA STORE ----------------------
+def demo_kpis():
+    # Imported here: the demo fixtures are only needed for a new database.
+    from kcca_demo import make_demo_kpi_data
+    return make_demo_kpi_data()
 
-# ---------------------- NDP III PROGRAMMES ----------------------
-NDP_PROGRAMMES = [
-    "Integrated Transport Infrastructure and Services",
-    "Sustainable Urban Development",
-    "Human Capital Development",
-    "Community Mobilization and Mindset Change",
-    "Natural Resources, Environment, Climate Change, Land and Water Management",
-    "Private Sector Development",
-    "Digital Transformation",
-    "Innovation, Technology Development",
-    "Governance and Security",
-    "Public Sector Transformation",
-    "Sustainable Energy Development",
-    "Tourism Development",
-    "Regional Development"
-]
-
-# ---------------------- SESSION STATE INITIALIZATION ----------------------
-def init_df(key, columns, starter_data=None):
-    if key not in st.session_state or not isinstance(st.session_state[key], pd.DataFrame):
-        if starter_data is not None:
-            st.session_state[key] = pd.DataFrame(starter_data)
-        else:
-            st.session_state[key] = pd.DataFrame(columns=columns)
-
-def make_demo_kpi_data():
-    demo = []
-    status_cycle = ["Green", "Amber", "Red", "Green"]
-    ndp_cycle = NDP_PROGRAMMES * 3
-    idx = 0
-    # Office of the Executive Director
-    for dept in ED_DEPARTMENTS:
-        demo.append({
-            "Directorate": "Office of the Executive Director",
-            "Department": dept,
-            "KPI": f"{dept} KPI Example",
-            "Target": 100,
-            "Current": 90-idx*5,
-            "Status": status_cycle[idx % len(status_cycle)],
-            "NDP Programme": ndp_cycle[idx % len(ndp_cycle)]
-        })
-        idx += 1
-    for dir_name in [d for d in KCCA_DIRECTORATES if d != "Office of the Executive Director"]:
-        demo.append({
-            "Directorate": dir_name,
-            "Department": dir_name,
-            "KPI": f"{dir_name} KPI Example",
-            "Target": 100,
-            "Current": 85-idx*4,
-            "Status": status_cycle[idx % len(status_cycle)],
-            "NDP Programme": ndp_cycle[idx % len(ndp_cycle)]
-        })
-        idx += 1
-    return demo
+@st.cache_resource
+def get_store():
+    # One store per process, shared by every session; demo KPIs are only
+    # written the first time the database is created.
+    store = HubStore(DB_PATH)
+    store.seed("kpi_data", demo_kpis)
+    return store
+
+with profiler.section("init: store"):
+    store = get_store()
+
+@st.cache_resource
+def get_blob_store():
+    return BlobStore(BLOB_DIR)
+
+with profiler.section("init: blob store"):
+    blobs = get_blob_store()
+
+@st.cache_resource
+def get_report_jobs():
+    # One scheduler and worker pool per process; every session reads its snapshots.
+    return ReportJobs(store)
+
+with profiler.section("init: report jobs"):
+    jobs = get_report_jobs()
+
+# ---------------------- REFERENCE DATA ----------------------
+@st.cache_resource
+def get_reference_data():
+    """Static vocabularies in the shapes the pages render, built once per process."""
+    return {
+        "ndp_programmes": pd.DataFrame({"NDP Programme": NDP_PROGRAMMES}),
+        "filter_options": {
+            (table, col): list(kind.categories)
+            for table, schema in SCHEMAS.items()
+            for col, kind in schema.items()
+            if isinstance(kind, pd.CategoricalDtype)
+        },
+    }
+
+reference = get_reference_data()
+
+# ---------------------- PAGED TABLE COMPONENT ----------------------
+PAGE_SIZE = 50
+
+@st.fragment
+def paged_table(table, key, filter_cols=(), fixed_filters=None, page_size=PAGE_SIZE):
+    """``table_page`` as a fragment, so paging, sorting and filtering rerun only the table.
+
+    Fragments must not be nested: inside another fragment, or where the
+    caller uses the returned rows, call ``table_page`` directly.
+    """
+    table_page(table, key, filter_cols, fixed_filters, page_size)
+
+def table_page(table, key, filter_cols=(), fixed_filters=None, page_size=PAGE_SIZE):
+    """Show ``table`` one page at a time; filtering, sorting and paging run in SQLite.
+
+    ``filter_cols`` get a multiselect over their fixed vocabulary and
+    ``fixed_filters`` ({column: [values]}) are always applied. Returns the
+    rows on the visible page.
+    """
+    filters = dict(fixed_filters or {})
+    controls = st.columns(len(filter_cols) + 2)
+    for col, slot in zip(filter_cols, controls):
+        chosen = slot.multiselect(col, reference["filter_options"][(table, col)], key=f"{key}_filter_{col}")
+        if chosen:
+            filters[col] = chosen
+    sort_by = controls[-2].selectbox("Sort by", ["(entry order)"] + columns(table), key=f"{key}_sort")
+    descending = controls[-1].checkbox("Descending", key=f"{key}_desc")
+    with profiler.section(f"query: {table} count"):
+        total = store.count_where(table, filters)
+    pages = max(1, math.ceil(total / page_size))
+    # Filters may shrink the result; keep the page number in range before the widget is drawn.
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key=f"{key}_page")
+    offset = (page - 1) * page_size
+    with profiler.section(f"query: {table} page"):
+        rows = store.page(
+            table,
+            filters,
+            sort_by=None if sort_by == "(entry order)" else sort_by,
+            descending=descending,
+            limit=page_size,
+            offset=offset
+        )
+    with profiler.section(f"render: {table} table"):
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+    st.caption(f"Showing rows {offset + 1 if total else 0}–{offset + len(rows)} of {total}")
+    return rows
+
+def saved(message):
+    """Finish a successful write made inside a fragment.
+
+    Page forms and pickers run as fragments, so their widgets rerun only
+    themselves. After a write this reruns the whole app so every chart and
+    table shows the new data, and shows ``message`` once at the top of that
+    run.
+    """
+    jobs.refresh_stale("write")
+    st.session_state["saved_message"] = message
+    st.rerun()
+
+# ---------------------- CACHED CHARTS ----------------------
+# Figures are shared across sessions and keyed by table version plus view
+# parameters, so widget interactions that do not change the data reuse them.
+@st.cache_resource(max_entries=16, show_spinner=False)
+def cached_kpi_progress_figure(version, max_points):
+    return kpi_progress_figure(store.read("kpi_data"), max_points)
 
-init_df("kpi_data", ["Directorate", "Department", "KPI", "Target", "Current", "Status", "NDP Programme"], starter_data=make_demo_kpi_data())
-init_df("weekly_eval", ["Directorate", "Department", "Week", "Score"])
-init_df("projects_df", ["Directorate", "Department", "Project", "NDP Programme", "Status", "Due Date"])
-init_df("risks_df", ["Directorate", "Department", "Issue", "Urgency", "Date"])
-init_df("budget_df", ["Directorate", "Department", "Budget", "Expenditure", "Variance"])
-init_df("documents", ["Name", "Type", "Uploaded By", "Date", "Notes"])
+@st.cache_resource(max_entries=16, show_spinner=False)
+def cached_ndp_fulfillment_figure(version):
+    ndp_fulfillment = store.aggregates("kpi_data").summary("NDP Programme")["Fulfillment %"].reset_index()
+    return ndp_fulfillment, ndp_fulfillment_figure(ndp_fulfillment)
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def cached_trend_series(version, directorate, department, max_points):
+    trend = store.aggregates("weekly_eval").unit(directorate, department)
+    return trend_series(trend[["Score", "Rolling Mean"]], max_points)
+
+# ---------------------- BACKGROUND REPORTS ----------------------
+REPORT_POLL_SECONDS = 5
+
+def report_state(name):
+    job = jobs.status(name)
+    if job.state == "running":
+        return "cancelling…" if job.cancel.is_set() else f"running since {job.started:%H:%M:%S}"
+    if job.state == "failed":
+        return f"failed: {job.error}"
+    return "idle" if job.state == "done" else job.state
+
+def report_panel(name, chart=None, description=None):
+    """Latest snapshot of a background report with its freshness, job status and controls.
+
+    ``description`` is shown under the title to say what the report measures.
+
+    Only polls, every ``REPORT_POLL_SECONDS``, while the report's job is
+    queued or running, so a finished job shows up without a page rerun;
+    otherwise the panel is redrawn only when the page reruns.
+    """
+    if jobs.status(name).state in ACTIVE:
+        polled_report_panel(name, chart, description)
+    else:
+        static_report_panel(name, chart, description)
+
+@st.fragment(run_every=REPORT_POLL_SECONDS)
+def polled_report_panel(name, chart, description):
+    if jobs.status(name).state not in ACTIVE:
+        # The job finished: rerun the page so it shows the new snapshot and stops polling.
+        st.rerun()
+    draw_report_panel(name, chart, description)
+
+@st.fragment
+def static_report_panel(name, chart, description):
+    draw_report_panel(name, chart, description)
+
+def draw_report_panel(name, chart, description):
+    st.subheader(name)
+    if description:
+        st.caption(description)
+    info, refresh_col, cancel_col = st.columns([6, 1, 1])
+    if role in ["Admin", "Strategy Officer"]:
+        running = jobs.status(name).state in ACTIVE
+        if refresh_col.button("Refresh", key=f"report_refresh_{name}", disabled=running):
+            jobs.refresh(name)
+            # Rerun the page so the panel starts polling the queued job.
+            st.rerun()
+        if cancel_col.button("Cancel", key=f"report_cancel_{name}", disabled=not running):
+            jobs.cancel(name)
+    snapshot = jobs.latest(name)
+    if snapshot is None:
+        info.caption(f"Job: {report_state(name)}")
+        st.info("This report is being prepared in the background.")
+        return
+    stale = jobs.stale(name)
+    info.caption(
+        f"{'⚠️ Stale: ' + stale if stale else '✅ Up to date'} · "
+        f"computed {snapshot.computed_at:%Y-%m-%d %H:%M:%S} in {snapshot.seconds:.2f}s · job: {report_state(name)}"
+    )
+    if snapshot.frame.empty:
+        st.info("No data for this report yet.")
+        return
+    if chart is not None:
+        chart(snapshot.frame)
+    st.dataframe(snapshot.frame, use_container_width=True, hide_index=True)
+
+def report_jobs_table():
+    """Job status of every report; polls like ``report_panel`` only while a job is active."""
+    if any(jobs.status(name).state in ACTIVE for name in REPORTS):
+        polled_report_jobs_table()
+    else:
+        draw_report_jobs_table()
+
+@st.fragment(run_every=REPORT_POLL_SECONDS)
+def polled_report_jobs_table():
+    if not any(jobs.status(name).state in ACTIVE for name in REPORTS):
+        st.rerun()
+    draw_report_jobs_table()
+
+def draw_report_jobs_table():
+    rows = []
+    for name in REPORTS:
+        snapshot = jobs.latest(name)
+        rows.append({
+            "Report": name,
+            "Job": report_state(name),
+            "Computed": None if snapshot is None else snapshot.computed_at,
+            "Compute s": None if snapshot is None else round(snapshot.seconds, 2),
+            "Freshness": jobs.stale(name) or "up to date"
+        })
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
 
 # ---------------------- SIDEBAR: AUTH & NAVIGATION ----------------------
-with st.sidebar:
+with st.sidebar, profiler.section("sidebar"):
     st.title("KCCA Strategy Hub")
     username = st.text_input("Username", value="", max_chars=30, key="user")
     role = st.selectbox("Role", ["Strategy Officer", "Admin", "Viewer"], key="role")
@@ -126,73 +266,80 @@ with st.sidebar:
             "Project Management",
             "Risk Reporting",
             "Budget Monitoring",
-            "Document Repository"
-        ]
+            "Document Repository",
+            "Search",
+            "Data Import & Export"
+        ],
+        key="menu"
     )
     st.caption(f"Logged in as: **{username or 'Anonymous'}** ({role})")
 
 # ---------------------- STRATEGIC PLAN TRACKER ----------------------
 def strategic_plan_tracker():
     st.header("📈 Strategic Plan Tracker")
-    kpi_data = st.session_state["kpi_data"]
     st.write("Monitor, add, and update KPIs for all KCCA directorates/departments, aligned to NDP III programmes. Officers can fine-tune demo data below.")
-    if not kpi_data.empty:
-        color_map = {"Green": "#34c759", "Amber": "#ffd60a", "Red": "#ff3b30"}
-        fig = px.bar(
-            kpi_data,
-            x="KPI",
-            y="Current",
-            color="Status",
-            color_discrete_map=color_map,
-            hover_data=["Directorate", "Department", "Target", "NDP Programme"],
-            barmode="group",
-            title="KPI Progress"
-        )
-        st.plotly_chart(fig, use_container_width=True)
-        st.dataframe(kpi_data, use_container_width=True)
+    if store.count("kpi_data"):
+        with profiler.section("chart: KPI progress"):
+            fig = cached_kpi_progress_figure(store.version("kpi_data"), CHART_MAX_POINTS)
+        with profiler.section("render: KPI progress chart"):
+            st.plotly_chart(fig, use_container_width=True)
+        paged_table("kpi_data", "kpi_table", filter_cols=("Directorate", "Status", "NDP Programme"))
     else:
         st.info("No KPI data available yet.")
 
     if role in ["Admin", "Strategy Officer"]:
-        st.subheader("Add or Update KPI")
-        with st.form("update_kpi", clear_on_submit=True):
-            directorate = st.selectbox("Directorate", KCCA_DIRECTORATES)
-            if directorate == "Office of the Executive Director":
-                departments = ED_DEPARTMENTS
-                dept = st.selectbox("Department", departments)
+        kpi_editor()
+
+@st.fragment
+def kpi_editor():
+    st.subheader("Add or Update KPI")
+    with st.form("update_kpi", clear_on_submit=True):
+        directorate = st.selectbox("Directorate", KCCA_DIRECTORATES)
+        if directorate == "Office of the Executive Director":
+            departments = ED_DEPARTMENTS
+            dept = st.selectbox("Department", departments)
+        else:
+            dept = directorate
+            st.text_input("Department", value=dept, disabled=True, key="kpi_dept_display")
+        kpi = st.text_input("KPI Name")
+        ndp_prog = st.selectbox("NDP Programme", NDP_PROGRAMMES)
+        target = st.number_input("Target Value", min_value=0)
+        current = st.number_input("Current Value", min_value=0)
+        status = st.selectbox("Status", KPI_STATUSES)
+        submit = st.form_submit_button("Submit KPI")
+        if submit and kpi:
+            store.upsert("kpi_data", {
+                "Directorate": directorate,
+                "Department": dept if directorate == "Office of the Executive Director" else directorate,
+                "KPI": kpi,
+                "Target": target,
+                "Current": current,
+                "Status": status,
+                "NDP Programme": ndp_prog
+            })
+            saved("KPI added or updated!")
+
+    st.subheader("Bulk Update KPIs from CSV")
+    kpi_csv = st.file_uploader(
+        "KPI CSV (Directorate, Department, KPI, Target, Current, Status, NDP Programme)",
+        type=["csv"],
+        key="kpi_bulk_csv"
+    )
+    if kpi_csv is not None and st.button("Apply KPI CSV"):
+        try:
+            report = import_file(store, "kpi_data", kpi_csv, kpi_csv.name)
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            message = f"{report.rows_loaded - report.rows_updated} KPIs added, {report.rows_updated} KPIs updated."
+            if not report.rows_rejected:
+                saved(message)
             else:
-                dept = directorate
-                st.text_input("Department", value=dept, disabled=True, key="kpi_dept_display")
-            kpi = st.text_input("KPI Name")
-            ndp_prog = st.selectbox("NDP Programme", NDP_PROGRAMMES)
-            target = st.number_input("Target Value", min_value=0)
-            current = st.number_input("Current Value", min_value=0)
-            status = st.selectbox("Status", ["Green", "Amber", "Red"])
-            submit = st.form_submit_button("Submit KPI")
-            if submit and kpi:
-                df = st.session_state["kpi_data"]
-                idx = df[
-                    (df["Directorate"] == directorate) &
-                    (df["Department"] == (dept if directorate == "Office of the Executive Director" else directorate)) &
-                    (df["KPI"] == kpi)
-                ].index
-                if len(idx):
-                    df.loc[idx, ["Target", "Current", "Status", "NDP Programme"]] = [
-                        target, current, status, ndp_prog
-                    ]
-                else:
-                    new_row = pd.DataFrame([{
-                        "Directorate": directorate,
-                        "Department": dept if directorate == "Office of the Executive Director" else directorate,
-                        "KPI": kpi,
-                        "Target": target,
-                        "Current": current,
-                        "Status": status,
-                        "NDP Programme": ndp_prog
-                    }])
-                    df = pd.concat([df, new_row], ignore_index=True)
-                st.session_state["kpi_data"] = df
-                st.success("KPI added or updated!")
+                # Keep the rejected rows on screen instead of rerunning the app.
+                jobs.refresh_stale("write")
+                st.success(message)
+                st.warning(f"{report.rows_rejected} rows were rejected and not applied.")
+                st.dataframe(report.errors, use_container_width=True)
 
 # ---------------------- WEEKLY EVALUATION ----------------------
 def weekly_evaluation():
@@ -202,11 +349,26 @@ def weekly_evaluation():
     for each directorate and department. The system supports continuous performance monitoring,
     trend analysis, and timely interventions for underperforming units.
     """
-    weekly_eval = st.session_state["weekly_eval"]
     st.write(
         "Track and report weekly performance for directorates and departments. "
         "Select the relevant directorate and department to view their recent scores and trends."
     )
+    weekly_unit_view()
+
+    with profiler.section("aggregate: flagged units"):
+        flagged = store.aggregates("weekly_eval").flagged()
+    st.subheader("Units Flagged for Intervention")
+    if not flagged.empty:
+        st.dataframe(flagged, use_container_width=True, hide_index=True)
+    else:
+        st.success("No unit's latest weekly score is significantly below its recent baseline.")
+
+    if role in ["Admin", "Strategy Officer"]:
+        weekly_form()
+
+@st.fragment
+def weekly_unit_view():
+    """Unit picker with its trend metrics, chart and table."""
     directorate = st.selectbox("Directorate", KCCA_DIRECTORATES, key="weekly_dir")
     if directorate == "Office of the Executive Director":
         departments = ED_DEPARTMENTS
@@ -214,33 +376,57 @@ def weekly_evaluation():
     else:
         dept = directorate
         st.text_input("Department", value=dept, disabled=True, key="weekly_dept_display")
-    filtered = weekly_eval[
-        (weekly_eval["Directorate"] == directorate) & (weekly_eval["Department"] == (dept if directorate == "Office of the Executive Director" else directorate))
-    ] if not weekly_eval.empty else pd.DataFrame()
-
-    if not filtered.empty:
-        st.subheader("Weekly Performance Trend")
-        st.line_chart(filtered.set_index("Week")["Score"])
-        st.dataframe(filtered, use_container_width=True)
+    unit = {
+        "Directorate": [directorate],
+        "Department": [dept if directorate == "Office of the Executive Director" else directorate]
+    }
+
+    with profiler.section("aggregate: weekly trends"):
+        trend = store.aggregates("weekly_eval").unit(unit["Directorate"][0], unit["Department"][0])
+    if trend is not None:
+        latest = trend.iloc[-1]
+        cols = st.columns(3)
+        cols[0].metric(
+            f"Latest Score (week of {trend.index[-1]:%d %b %Y})",
+            f"{latest['Score']:.1f}",
+            None if pd.isna(latest["WoW Delta"]) else f"{latest['WoW Delta']:+.1f} vs previous week"
+        )
+        cols[1].metric("4-Week Rolling Mean", f"{latest['Rolling Mean']:.1f}")
+        cols[2].metric("Z-Score vs Baseline", "n/a" if pd.isna(latest["Z-Score"]) else f"{latest['Z-Score']:+.2f}")
+        if latest["Underperforming"]:
+            st.warning("This unit's latest score is well below its recent baseline and may need intervention.")
+        with profiler.section("chart: weekly trend"):
+            series, monthly = cached_trend_series(
+                store.version("weekly_eval"), unit["Directorate"][0], unit["Department"][0], CHART_MAX_POINTS
+            )
+        st.subheader("Monthly Performance Trend" if monthly else "Weekly Performance Trend")
+        with profiler.section("render: weekly trend chart"):
+            st.line_chart(series)
+        table_page(
+            "weekly_eval",
+            "weekly_table",
+            fixed_filters=unit
+        )
     else:
         st.info("No data for this department/directorate yet.")
 
-    if role in ["Admin", "Strategy Officer"]:
-        st.subheader("Add Weekly Evaluation Score")
-        with st.form("add_weekly_eval", clear_on_submit=True):
-            score = st.number_input("Weekly Score (0-100)", min_value=0, max_value=100)
-            week = st.date_input("Week", value=date.today())
-            submit = st.form_submit_button("Add Evaluation")
-            if submit:
-                new_row = pd.DataFrame([{
-                    "Directorate": directorate,
-                    "Department": dept if directorate == "Office of the Executive Director" else directorate,
-                    "Week": str(week),
-                    "Score": score
-                }])
-                weekly_eval = pd.concat([weekly_eval, new_row], ignore_index=True)
-                st.session_state["weekly_eval"] = weekly_eval
-                st.success("Weekly evaluation added.")
+@st.fragment
+def weekly_form():
+    st.subheader("Add Weekly Evaluation Score")
+    with st.form("add_weekly_eval", clear_on_submit=True):
+        st.caption("The score is recorded for the directorate and department selected above.")
+        score = st.number_input("Weekly Score (0-100)", min_value=0, max_value=100)
+        week = st.date_input("Week", value=date.today())
+        submit = st.form_submit_button("Add Evaluation")
+        if submit:
+            directorate = st.session_state["weekly_dir"]
+            store.append("weekly_eval", {
+                "Directorate": directorate,
+                "Department": st.session_state["weekly_dept"] if directorate == "Office of the Executive Director" else directorate,
+                "Week": week,
+                "Score": score
+            })
+            saved("Weekly evaluation added.")
 
 # ---------------------- PERFORMANCE DASHBOARD ----------------------
 def performance_dashboard():
@@ -249,16 +435,22 @@ def performance_dashboard():
     This dashboard provides a consolidated view of performance across all directorates and departments.
     It visualizes average scores, highlights leading and lagging units, and shows NDP Programme coverage.
     """
-    kpi_data = st.session_state["kpi_data"]
-    if not kpi_data.empty:
+    kpi_agg = store.aggregates("kpi_data")
+    if kpi_agg.totals["Department"]:
         st.subheader("Average Departmental Performance")
-        perf_agg = kpi_data.groupby("Department")["Current"].mean().reset_index()
-        st.bar_chart(perf_agg.set_index("Department"))
+        with profiler.section("aggregate: KPIs by department"):
+            perf_agg = kpi_agg.summary("Department")[["Current"]]
+        with profiler.section("render: department chart"):
+            st.bar_chart(perf_agg)
         st.subheader("NDP Programme KPI Coverage")
-        ndp_agg = kpi_data.groupby("NDP Programme").size().sort_values(ascending=False)
-        st.bar_chart(ndp_agg)
+        with profiler.section("aggregate: KPIs by NDP programme"):
+            ndp_agg = kpi_agg.summary("NDP Programme")["KPIs"].sort_values(ascending=False)
+        with profiler.section("render: NDP coverage chart"):
+            st.bar_chart(ndp_agg)
     else:
         st.info("No KPI data to show performance.")
+    st.subheader("Background Reports")
+    report_jobs_table()
 
 # ---------------------- NDP ALIGNMENT ----------------------
 def ndp_alignment():
@@ -267,29 +459,27 @@ def ndp_alignment():
     This module summarizes how KCCA's strategic actions and KPIs align with Uganda's National Development Plan III.
     It identifies strengths and gaps in programme fulfillment across all directorates and departments.
     """
-    kpi_data = st.session_state["kpi_data"]
+    kpi_agg = store.aggregates("kpi_data")
     st.write(
         "Review how departmental KPIs and targets are distributed across the 13 NDP III Programmes. "
         "This helps ensure that KCCA's work is fully aligned with national priorities."
     )
-    st.dataframe(pd.DataFrame({"NDP Programme": NDP_PROGRAMMES}), use_container_width=True)
-    if not kpi_data.empty:
-        ndp_fulfillment = (
-            kpi_data.groupby("NDP Programme")
-            .apply(lambda df: (df["Status"] == "Green").sum() / len(df) * 100 if len(df) > 0 else 0)
-            .reset_index(name="Fulfillment %")
-        )
+    st.dataframe(reference["ndp_programmes"], use_container_width=True)
+    if kpi_agg.totals["NDP Programme"]:
+        with profiler.section("chart: NDP fulfillment"):
+            ndp_fulfillment, fig = cached_ndp_fulfillment_figure(store.version("kpi_data"))
         st.subheader("Programme Fulfillment Status")
-        fig = px.bar(
-            ndp_fulfillment,
-            x="NDP Programme",
-            y="Fulfillment %",
-            title="NDP Programme Fulfillment (%)"
-        )
-        st.plotly_chart(fig, use_container_width=True)
-        st.dataframe(ndp_fulfillment, use_container_width=True)
+        with profiler.section("render: NDP fulfillment chart"):
+            st.plotly_chart(fig, use_container_width=True)
+            st.dataframe(ndp_fulfillment, use_container_width=True)
     else:
         st.info("No KPI data for NDP alignment.")
+    report_panel(
+        "NDP Project Completion by Quarter",
+        lambda f: st.line_chart(f.pivot(index="Quarter", columns="NDP Programme", values="Projects Completed %")),
+        "Share of the projects due in each quarter that are completed, per NDP programme. "
+        "Programme Fulfillment above is the share of Green KPIs instead."
+    )
 
 # ---------------------- PROJECT MANAGEMENT ----------------------
 def project_management():
@@ -299,42 +489,97 @@ def project_management():
     under different directorates and departments. This supports effective delivery and
     accountability for all project milestones and outcomes.
     """
-    projects_df = st.session_state["projects_df"]
     st.write(
         "Manage projects, assign them to departments, and track their status and deadlines. "
         "View all ongoing and completed initiatives below."
     )
-    if not projects_df.empty:
-        st.dataframe(projects_df, use_container_width=True)
+    if store.count("projects_df"):
+        paged_table("projects_df", "projects_table", filter_cols=("Directorate", "Status", "NDP Programme"))
+        schedule_alerts()
     else:
         st.info("No projects found.")
     if role in ["Admin", "Strategy Officer"]:
-        st.subheader("Add New Project")
-        with st.form("add_project", clear_on_submit=True):
-            directorate = st.selectbox("Directorate", KCCA_DIRECTORATES, key="proj_dir")
-            if directorate == "Office of the Executive Director":
-                departments = ED_DEPARTMENTS
-                dept = st.selectbox("Department", departments, key="proj_dept")
+        project_form()
+        project_status_form()
+
+ALERT_ROWS = 200
+
+@st.fragment
+def schedule_alerts():
+    st.subheader("Schedule Alerts")
+    days_col, weeks_col = st.columns(2)
+    days = days_col.number_input("Due within (days)", min_value=1, max_value=365, value=DUE_SOON_DAYS, key="alert_days")
+    weeks = weeks_col.number_input("Stalled for at least (weeks)", min_value=1, max_value=104, value=STALLED_WEEKS, key="alert_weeks")
+    with profiler.section("aggregate: schedule digest"):
+        schedule = store.aggregates("projects_df")
+        digest = schedule.digest(days, weeks)
+    with profiler.section("render: schedule digest"):
+        st.bar_chart(digest[["Overdue", f"Due in {days} Days", f"Stalled {weeks}+ Weeks"]])
+        st.dataframe(digest, use_container_width=True)
+
+    lists = {
+        "Overdue": schedule.overdue(),
+        f"Due in {days} Days": schedule.due_within(days),
+        f"Stalled {weeks}+ Weeks": schedule.stalled_for(weeks),
+    }
+    projects = store.read("projects_df")
+    for tab, (label, rows) in zip(st.tabs([f"{k} ({len(v)})" for k, v in lists.items()]), lists.items()):
+        with tab:
+            if len(rows) > ALERT_ROWS:
+                st.caption(f"Showing the first {ALERT_ROWS} of {len(rows)} projects.")
+            st.dataframe(projects.iloc[rows[:ALERT_ROWS]], use_container_width=True, hide_index=True)
+
+@st.fragment
+def project_form():
+    st.subheader("Add New Project")
+    with st.form("add_project", clear_on_submit=True):
+        directorate = st.selectbox("Directorate", KCCA_DIRECTORATES, key="proj_dir")
+        if directorate == "Office of the Executive Director":
+            departments = ED_DEPARTMENTS
+            dept = st.selectbox("Department", departments, key="proj_dept")
+        else:
+            dept = directorate
+            st.text_input("Department", value=dept, disabled=True, key="proj_dept_display")
+        proj = st.text_input("Project Title")
+        ndp_prog = st.selectbox("NDP Programme", NDP_PROGRAMMES, key="proj_ndp")
+        status = st.selectbox("Status", PROJECT_STATUSES)
+        due = st.date_input("Due Date", value=date.today(), key="proj_due")
+        submit = st.form_submit_button("Add Project")
+        if submit and proj:
+            store.append("projects_df", {
+                "Directorate": directorate,
+                "Department": dept if directorate == "Office of the Executive Director" else directorate,
+                "Project": proj,
+                "NDP Programme": ndp_prog,
+                "Status": status,
+                "Due Date": due,
+                "Status Updated": datetime.now()
+            })
+            saved("Project added.")
+
+@st.fragment
+def project_status_form():
+    st.subheader("Update Project Status")
+    with st.form("update_project_status", clear_on_submit=True):
+        directorate = st.selectbox("Directorate", KCCA_DIRECTORATES, key="proj_status_dir")
+        if directorate == "Office of the Executive Director":
+            dept = st.selectbox("Department", ED_DEPARTMENTS, key="proj_status_dept")
+        else:
+            dept = directorate
+            st.text_input("Department", value=dept, disabled=True, key="proj_status_dept_display")
+        proj = st.text_input("Project Title", key="proj_status_title")
+        status = st.selectbox("New Status", PROJECT_STATUSES, key="proj_status_new")
+        submit = st.form_submit_button("Update Status")
+        if submit and proj:
+            updated = store.update_where(
+                "projects_df",
+                {"Directorate": directorate, "Department": dept, "Project": proj},
+                {"Status": status, "Status Updated": datetime.now()}
+            )
+            if updated:
+                saved(f"Status of '{proj}' set to {status}.")
             else:
-                dept = directorate
-                st.text_input("Department", value=dept, disabled=True, key="proj_dept_display")
-            proj = st.text_input("Project Title")
-            ndp_prog = st.selectbox("NDP Programme", NDP_PROGRAMMES, key="proj_ndp")
-            status = st.selectbox("Status", ["Not Started", "In Progress", "Completed", "Stalled"])
-            due = st.date_input("Due Date", value=date.today(), key="proj_due")
-            submit = st.form_submit_button("Add Project")
-            if submit and proj:
-                new_row = pd.DataFrame([{
-                    "Directorate": directorate,
-                    "Department": dept if directorate == "Office of the Executive Director" else directorate,
-                    "Project": proj,
-                    "NDP Programme": ndp_prog,
-                    "Status": status,
-                    "Due Date": str(due)
-                }])
-                projects_df = pd.concat([projects_df, new_row], ignore_index=True)
-                st.session_state["projects_df"] = projects_df
-                st.success("Project added.")
+                st.warning(f"No project titled '{proj}' in {dept}.")
 
 # ---------------------- RISK & BOTTLENECK REPORTING ----------------------
 def risk_reporting():
@@ -344,39 +589,40 @@ def risk_reporting():
     and challenges encountered by directorates and departments. It supports early detection,
     escalation, and resolution of key issues.
     """
-    risks_df = st.session_state["risks_df"]
     st.write(
         "Report and view risks or operational bottlenecks that affect performance. "
         "Review all reported issues, their urgency, and date of reporting."
     )
-    if not risks_df.empty:
-        st.dataframe(risks_df, use_container_width=True)
+    if store.count("risks_df"):
+        paged_table("risks_df", "risks_table", filter_cols=("Directorate", "Department", "Urgency"))
     else:
         st.info("No risks reported yet.")
     if role in ["Admin", "Strategy Officer"]:
-        st.subheader("Report a New Risk or Bottleneck")
-        with st.form("risk_form", clear_on_submit=True):
-            directorate = st.selectbox("Directorate", KCCA_DIRECTORATES, key="risk_dir")
-            if directorate == "Office of the Executive Director":
-                departments = ED_DEPARTMENTS
-                dept = st.selectbox("Department", departments, key="risk_dept")
-            else:
-                dept = directorate
-                st.text_input("Department", value=dept, disabled=True, key="risk_dept_display")
-            issue = st.text_area("Describe the issue or risk")
-            urgency = st.selectbox("Urgency", ["Low", "Medium", "High", "Critical"])
-            submit = st.form_submit_button("Submit Report")
-            if submit and issue:
-                new_row = pd.DataFrame([{
-                    "Directorate": directorate,
-                    "Department": dept if directorate == "Office of the Executive Director" else directorate,
-                    "Issue": issue,
-                    "Urgency": urgency,
-                    "Date": datetime.now().isoformat(timespec="seconds")
-                }])
-                risks_df = pd.concat([risks_df, new_row], ignore_index=True)
-                st.session_state["risks_df"] = risks_df
-                st.success("Risk reported.")
+        risk_form()
+
+@st.fragment
+def risk_form():
+    st.subheader("Report a New Risk or Bottleneck")
+    with st.form("risk_form", clear_on_submit=True):
+        directorate = st.selectbox("Directorate", KCCA_DIRECTORATES, key="risk_dir")
+        if directorate == "Office of the Executive Director":
+            departments = ED_DEPARTMENTS
+            dept = st.selectbox("Department", departments, key="risk_dept")
+        else:
+            dept = directorate
+            st.text_input("Department", value=dept, disabled=True, key="risk_dept_display")
+        issue = st.text_area("Describe the issue or risk")
+        urgency = st.selectbox("Urgency", URGENCY_LEVELS)
+        submit = st.form_submit_button("Submit Report")
+        if submit and issue:
+            store.append("risks_df", {
+                "Directorate": directorate,
+                "Department": dept if directorate == "Office of the Executive Director" else directorate,
+                "Issue": issue,
+                "Urgency": urgency,
+                "Date": datetime.now()
+            })
+            saved("Risk reported.")
 
 # ---------------------- BUDGET MONITORING ----------------------
 def budget_monitoring():
@@ -385,41 +631,92 @@ def budget_monitoring():
     This section enables real-time tracking and comparison of approved budgets and actual expenditures
     for each directorate and department. It helps ensure budget discipline and financial accountability.
     """
-    budget_df = st.session_state["budget_df"]
     st.write(
         "Monitor, report, and analyze budgeting and expenditure performance for all directorates and departments. "
         "Visualize spending trends and identify areas of over- or under-expenditure."
     )
-    if not budget_df.empty:
-        st.dataframe(budget_df, use_container_width=True)
-        st.bar_chart(budget_df.set_index("Department")["Expenditure"])
+    with profiler.section("aggregate: budget cube"):
+        cube = store.aggregates("budget_df")
+    if cube.cells:
+        budget_analysis()
+        st.subheader("Ledger Postings")
+        paged_table("budget_df", "budget_table", filter_cols=("Directorate",))
     else:
         st.info("No budget data yet.")
     if role in ["Admin", "Strategy Officer"]:
-        st.subheader("Add Budget Data")
-        with st.form("add_budget", clear_on_submit=True):
-            directorate = st.selectbox("Directorate", KCCA_DIRECTORATES, key="budget_dir")
-            if directorate == "Office of the Executive Director":
-                departments = ED_DEPARTMENTS
-                dept = st.selectbox("Department", departments, key="budget_dept")
-            else:
-                dept = directorate
-                st.text_input("Department", value=dept, disabled=True, key="budget_dept_display")
-            budget = st.number_input("Approved Budget (UGX)", min_value=0)
-            expenditure = st.number_input("Expenditure (UGX)", min_value=0)
-            variance = budget - expenditure
-            submit = st.form_submit_button("Add Budget Data")
-            if submit:
-                new_row = pd.DataFrame([{
-                    "Directorate": directorate,
-                    "Department": dept if directorate == "Office of the Executive Director" else directorate,
-                    "Budget": budget,
-                    "Expenditure": expenditure,
-                    "Variance": variance
-                }])
-                budget_df = pd.concat([budget_df, new_row], ignore_index=True)
-                st.session_state["budget_df"] = budget_df
-                st.success("Budget data added.")
+        budget_form()
+
+def ugx(amount):
+    return f"UGX {amount:,.0f}"
+
+@st.fragment
+def budget_analysis():
+    cube = store.aggregates("budget_df")
+    years = cube.fiscal_years()
+    view = st.radio("Roll up by", ["Directorate", "Department", "Line Item"], horizontal=True, key="budget_view")
+    if not years:
+        # Only postings recorded before the ledger had periods.
+        st.caption("No postings have a period yet, so totals cover all postings and there is no projection.")
+        st.bar_chart(cube.rollup(view)[["Budget", "Expenditure"]])
+        st.dataframe(cube.rollup(view), use_container_width=True)
+        return
+    year = st.selectbox("Fiscal Year", years, format_func=fiscal_year_label, key="budget_year")
+    with profiler.section("aggregate: budget roll-ups"):
+        monthly = cube.monthly(year)
+        outlook = cube.outlook(view, year)
+        rollup = cube.rollup(view, year)
+    budget, spent = monthly["Budget"].sum(), monthly["Expenditure"].sum()
+    projected = outlook["Projected Spend"].sum()
+    cols = st.columns(4)
+    cols[0].metric("Approved Budget", ugx(budget))
+    cols[1].metric("Expenditure", ugx(spent))
+    cols[2].metric("Burn Rate", f"{spent / budget * 100:.1f}%" if budget else "n/a")
+    cols[3].metric(
+        "Projected Year-End Variance",
+        ugx(budget - projected),
+        "overspend" if projected > budget else "underspend",
+        delta_color="inverse" if projected > budget else "normal"
+    )
+
+    with profiler.section("render: budget charts"):
+        st.subheader(f"Budget vs Expenditure by {view}")
+        st.bar_chart(rollup[["Budget", "Expenditure"]])
+        st.subheader(f"Cumulative Spend, {fiscal_year_label(year)}")
+        st.line_chart(monthly[["Cumulative Budget", "Cumulative Expenditure"]])
+    st.subheader(f"Year-End Outlook by {view}")
+    st.dataframe(outlook.round(0), use_container_width=True)
+
+@st.fragment
+def budget_form():
+    st.subheader("Add Budget Data")
+    with st.form("add_budget", clear_on_submit=True):
+        directorate = st.selectbox("Directorate", KCCA_DIRECTORATES, key="budget_dir")
+        if directorate == "Office of the Executive Director":
+            departments = ED_DEPARTMENTS
+            dept = st.selectbox("Department", departments, key="budget_dept")
+        else:
+            dept = directorate
+            st.text_input("Department", value=dept, disabled=True, key="budget_dept_display")
+        line_item = st.selectbox("Line Item", BUDGET_LINE_ITEMS)
+        current_year = fiscal_year(date.today())
+        months = list(fiscal_months(current_year - 1)) + list(fiscal_months(current_year))
+        this_month = pd.Timestamp(date.today()).to_period("M").start_time
+        period = st.selectbox("Period", months, index=months.index(this_month), format_func=lambda m: f"{m:%b %Y}")
+        budget = st.number_input("Approved Budget (UGX)", min_value=0)
+        expenditure = st.number_input("Expenditure (UGX)", min_value=0)
+        variance = budget - expenditure
+        submit = st.form_submit_button("Add Budget Data")
+        if submit:
+            store.append("budget_df", {
+                "Directorate": directorate,
+                "Department": dept if directorate == "Office of the Executive Director" else directorate,
+                "Line Item": line_item,
+                "Period": period,
+                "Budget": budget,
+                "Expenditure": expenditure,
+                "Variance": variance
+            })
+            saved("Budget data added.")
 
 # ---------------------- DOCUMENT REPOSITORY ----------------------
 def document_repository():
@@ -428,50 +725,201 @@ def document_repository():
     This module provides a secure and centralized repository for uploading, storing, and reviewing
     key strategy documents, reports, and knowledge products across KCCA.
     """
-    docs = st.session_state["documents"]
     st.write(
         "Upload and view strategy documents, reports, and reference materials. "
         "This helps facilitate knowledge sharing and institutional memory."
     )
-    if not docs.empty:
-        st.dataframe(docs, use_container_width=True)
+    if store.count("documents"):
+        document_browser()
+    if role in ["Admin", "Strategy Officer"]:
+        document_upload()
+
+@st.fragment
+def document_browser():
+    """Document table plus a download picker for the rows on the visible page."""
+    shown = table_page("documents", "documents_table")
+    stored = shown[shown["SHA256"].notna()].reset_index(drop=True)
+    if not stored.empty:
+        choice = st.selectbox(
+            "Download a document from this page",
+            stored.index,
+            format_func=lambda i: f"{stored.at[i, 'Name']} ({stored.at[i, 'Uploaded By']}, {stored.at[i, 'Date']:%Y-%m-%d})",
+            key="doc_download_choice"
+        )
+        digest = stored.at[choice, "SHA256"]
+        # The file is only read from disk when the button is clicked.
+        st.download_button(
+            "Download",
+            data=lambda: blobs.read(digest),
+            file_name=stored.at[choice, "Name"],
+            mime=stored.at[choice, "Type"]
+        )
+
+@st.fragment
+def document_upload():
     uploaded_file = st.file_uploader("Upload document (PDF, DOCX, XLSX)", type=["pdf", "docx", "xlsx"])
     notes = st.text_area("Notes (describe document purpose, content, etc.)")
-    if uploaded_file and role in ["Admin", "Strategy Officer"]:
-        doc_type = uploaded_file.type
-        new_row = pd.DataFrame([{
-            "Name": uploaded_file.name,
-            "Type": doc_type,
-            "Uploaded By": username or "Anonymous",
-            "Date": datetime.now().isoformat(timespec="seconds"),
-            "Notes": notes
-        }])
-        docs = pd.concat([docs, new_row], ignore_index=True)
-        st.session_state["documents"] = docs
-        st.success(f"File '{uploaded_file.name}' uploaded! (Demo only, not stored)")
+    if uploaded_file and st.button("Save to Repository"):
+        uploaded_file.seek(0)
+        digest, size, _ = blobs.put(uploaded_file)
+        existing = store.get("documents", (digest,))
+        if existing is not None:
+            st.info(f"'{uploaded_file.name}' is already in the repository as '{existing['Name']}'.")
+        else:
+            store.append("documents", {
+                "Name": uploaded_file.name,
+                "Type": uploaded_file.type,
+                "Uploaded By": username or "Anonymous",
+                "Date": datetime.now(),
+                "Notes": notes,
+                "SHA256": digest,
+                "Size": size
+            })
+            saved(f"File '{uploaded_file.name}' saved to the repository.")
+
+# ---------------------- SEARCH ----------------------
+def search_page():
+    st.header("🔎 Search Risks, Projects & Documents")
+    """
+    This module searches the text of every risk and bottleneck, project and document note
+    in one place, so related issues can be found without paging through each register.
+    """
+    if not store.search_enabled:
+        st.info("Full-text search is not available with this SQLite build.")
+        return
+    search_panel()
+
+@st.fragment
+def search_panel():
+    """Query box, facet filters and results."""
+    query = st.text_input("Search for", key="search_query", placeholder="e.g. drainage flooding")
+    col1, col2, col3 = st.columns(3)
+    facets = {
+        "Kind": col1.multiselect("Kind", list(SEARCH_SOURCES), key="search_kind"),
+        "Directorate": col2.multiselect("Directorate", KCCA_DIRECTORATES, key="search_directorate"),
+        "Urgency": col3.multiselect("Urgency", URGENCY_LEVELS, key="search_urgency")
+    }
+    if not query.strip():
+        return
+    started = datetime.now()
+    results = store.search(query, facets)
+    counts = store.search_facets(query, facets)
+    elapsed_ms = (datetime.now() - started).total_seconds() * 1000
+    total = int(counts["Kind"].sum()) if counts else 0
+    st.caption(f"{total} matches in {elapsed_ms:.0f} ms (showing the best {len(results)})")
+    if results.empty:
+        st.info("No matches.")
+        return
+    st.dataframe(results, use_container_width=True, hide_index=True)
+    with st.expander("Matches by facet"):
+        for col, (label, series) in zip(st.columns(len(counts)), counts.items()):
+            col.write(f"**{label}**")
+            col.dataframe(series, use_container_width=True)
+
+# ---------------------- DATA IMPORT & EXPORT ----------------------
+REGISTERS = {
+    "KPIs": "kpi_data",
+    "Weekly Evaluations": "weekly_eval",
+    "Projects": "projects_df",
+    "Risks & Bottlenecks": "risks_df",
+    "Budget Data": "budget_df",
+    "Document Metadata": "documents"
+}
+
+def data_import_export():
+    st.header("🔄 Bulk Data Import & Export")
+    """
+    This module loads quarterly KPI, budget and other register data from CSV, Excel or Parquet
+    files in one step, validating every row against the directorate and department structure,
+    and exports any register for offline analysis and reporting.
+    """
+    st.write(
+        "Import whole registers from a file instead of entering rows one at a time, "
+        "or export a register as CSV or Parquet."
+    )
+    data_transfer()
+
+@st.fragment
+def data_transfer():
+    register = st.selectbox("Register", list(REGISTERS), key="io_register")
+    table = REGISTERS[register]
+    if role in ["Admin", "Strategy Officer"] and table != "documents":
+        st.subheader(f"Import {register}")
+        st.caption(f"Expected columns: {', '.join(columns(table))}")
+        upload = st.file_uploader("Data file", type=IMPORT_FORMATS, key="io_upload")
+        if upload is not None and st.button("Import File"):
+            try:
+                report = import_file(store, table, upload, upload.name)
+                jobs.refresh_stale("write")
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                st.success(f"{report.rows_loaded} of {report.rows_read} rows imported into {register}.")
+                if report.rows_rejected:
+                    st.warning(f"{report.rows_rejected} rows were rejected and not imported.")
+                    st.dataframe(report.errors, use_container_width=True)
+    st.subheader(f"Export {register}")
+    fmt = st.radio("Format", EXPORT_FORMATS, horizontal=True, key="io_format")
+    if st.button("Prepare Export"):
+        st.session_state["io_export"] = (table, fmt, export_snapshot(store, table, fmt))
+    prepared = st.session_state.get("io_export")
+    # The prepared file stays offered across reruns until another export replaces or prunes it.
+    if prepared and prepared[:2] == (table, fmt) and os.path.exists(prepared[2]):
+        path = prepared[2]
+        # The file is only read from disk when the button is clicked.
+        st.download_button(f"Download {register}", data=lambda: open(path, "rb"), file_name=f"{table}.{fmt}")
 
 # ---------------------- MAIN APP FLOW ----------------------
-if menu == "Strategic Plan Tracker":
-    strategic_plan_tracker()
-elif menu == "Weekly Evaluation":
-    weekly_evaluation()
-elif menu == "Performance Dashboard":
-    performance_dashboard()
-elif menu == "NDP Alignment":
-    ndp_alignment()
-elif menu == "Project Management":
-    project_management()
-elif menu == "Risk Reporting":
-    risk_reporting()
-elif menu == "Budget Monitoring":
-    budget_monitoring()
-elif menu == "Document Repository":
-    document_repository()
+if "saved_message" in st.session_state:
+    st.success(st.session_state.pop("saved_message"))
+
+with profiler.section(f"page: {menu}"):
+    if menu == "Strategic Plan Tracker":
+        strategic_plan_tracker()
+    elif menu == "Weekly Evaluation":
+        weekly_evaluation()
+    elif menu == "Performance Dashboard":
+        performance_dashboard()
+    elif menu == "NDP Alignment":
+        ndp_alignment()
+    elif menu == "Project Management":
+        project_management()
+    elif menu == "Risk Reporting":
+        risk_reporting()
+    elif menu == "Budget Monitoring":
+        budget_monitoring()
+    elif menu == "Document Repository":
+        document_repository()
+    elif menu == "Search":
+        search_page()
+    elif menu == "Data Import & Export":
+        data_import_export()
 
 # ---------------------- FOOTER ----------------------
 st.markdown("---")
 st.caption(
-    "KCCA Strategy Hub | Streamlit Professional Demo (In-memory, not persistent). "
+    "KCCA Strategy Hub | Streamlit Professional Demo (shared SQLite store, persistent across sessions). "
     "Developed for comprehensive Monitoring, Evaluation, Reporting, and Strategic Management across KCCA directorates. "
     f"Session started on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
 )
+
+# ---------------------- PROFILING PANEL ----------------------
+profile = profiler.finish_run(menu)
+if profile and role == "Admin":
+    with st.sidebar.expander("⏱️ Rerun Profile"):
+        st.caption("This rerun (nested sections are indented)")
+        st.dataframe(
+            pd.DataFrame({
+                "Section": ["\u2003" * depth + name for name, depth, _ in profile],
+                "ms": [round(seconds * 1000, 1) for _, _, seconds in profile]
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+        st.caption("Since this server process started")
+        totals = pd.DataFrame(
+            [(name, calls, seconds / calls * 1000, longest * 1000, seconds)
+             for name, (calls, seconds, longest) in profiler.totals().items()],
+            columns=["Section", "Calls", "Mean ms", "Max ms", "Total s"]
+        ).sort_values("Total s", ascending=False)
+        st.dataframe(totals.round(2), use_container_width=True, hide_index=True)
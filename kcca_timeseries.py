@@ -0,0 +1,128 @@
+"""Weekly performance trends for every directorate/department.
+
+``WeeklyTrends`` keeps one Week-indexed partition per (Directorate,
+Department). Each partition holds the weekly mean score plus a rolling mean,
+the week-over-week change and a z-score against the unit's own recent
+baseline; weeks scoring far below that baseline are flagged as
+underperforming.
+
+All metrics are computed with grouped rolling windows over every touched unit
+in one pass. New evaluations are queued on write and folded in on the next
+read: only the affected weeks (plus enough preceding weeks to fill the
+windows) are recomputed, so years of history are never reprocessed.
+"""
+import threading
+
+import pandas as pd
+
+from kcca_schema import apply_schema
+
+UNIT = ["Directorate", "Department"]
+ROLLING_WEEKS = 4
+BASELINE_WEEKS = 12
+MIN_BASELINE_WEEKS = 4
+Z_THRESHOLD = -1.5
+# Floor for the baseline standard deviation (in score points), so a unit with a
+# perfectly flat history still gets a finite z-score when it suddenly drops.
+MIN_BASELINE_STD = 1.0
+POINT_COLUMNS = ["Score Sum", "Entries", "Score", "Rolling Mean", "WoW Delta", "Z-Score", "Underperforming"]
+
+
+def weekly_points(rows):
+    """Collapse raw evaluation rows into one (sum, count) point per unit and week."""
+    grouped = rows.groupby(UNIT + ["Week"], observed=True, sort=True)["Score"]
+    return pd.DataFrame({"Score Sum": grouped.sum(), "Entries": grouped.count()}).reset_index()
+
+
+def compute_metrics(points, window=ROLLING_WEEKS, baseline=BASELINE_WEEKS, z_threshold=Z_THRESHOLD):
+    """Add trend columns to ``points`` (sorted by unit then Week) for all units at once."""
+    points = points.reset_index(drop=True)
+    points["Score"] = points["Score Sum"] / points["Entries"]
+    keys = [points[c] for c in UNIT]
+    by_unit = points.groupby(keys, observed=True, sort=False)["Score"]
+    points["Rolling Mean"] = by_unit.rolling(window, min_periods=1).mean().droplevel([0, 1])
+    points["WoW Delta"] = by_unit.diff()
+    previous = by_unit.shift(1).groupby(keys, observed=True, sort=False)
+    base_mean = previous.rolling(baseline, min_periods=MIN_BASELINE_WEEKS).mean().droplevel([0, 1])
+    base_std = previous.rolling(baseline, min_periods=MIN_BASELINE_WEEKS).std().droplevel([0, 1])
+    points["Z-Score"] = (points["Score"] - base_mean) / base_std.clip(lower=MIN_BASELINE_STD)
+    points["Underperforming"] = points["Z-Score"].le(z_threshold)
+    return points
+
+
+class WeeklyTrends:
+    """Incrementally maintained trend partitions for the ``weekly_eval`` table.
+
+    Registered as the store aggregate for ``weekly_eval``, so it is rebuilt
+    when the table changes outside this process and fed new rows on append.
+    The table is append-only; rows are never removed or edited.
+    """
+
+    def __init__(self, version, frame):
+        self.version = version
+        self.partitions = {}
+        self._pending = []
+        self._latest = None
+        self._lock = threading.Lock()
+        self._context = max(ROLLING_WEEKS - 1, BASELINE_WEEKS, 1)
+        if len(frame):
+            self._absorb(frame)
+
+    def apply(self, rows, sign):
+        if rows:
+            with self._lock:
+                self._pending.extend(rows)
+
+    def _materialize(self):
+        with self._lock:
+            if self._pending:
+                rows, self._pending = self._pending, []
+                self._absorb(apply_schema("weekly_eval", pd.DataFrame(rows)))
+
+    def _absorb(self, rows):
+        rows = rows.dropna(subset=UNIT + ["Week", "Score"])
+        if rows.empty:
+            return
+        pieces, starts = [], {}
+        for unit, pts in weekly_points(rows).groupby(UNIT, observed=True, sort=False):
+            pts = pts.set_index("Week")[["Score Sum", "Entries"]]
+            old = self.partitions.get(unit)
+            sums = pts if old is None else old[["Score Sum", "Entries"]].add(pts, fill_value=0)
+            first_new = sums.index.searchsorted(pts.index.min())
+            start = max(0, first_new - self._context)
+            piece = sums.iloc[start:].reset_index()
+            piece.insert(0, "Department", unit[1])
+            piece.insert(0, "Directorate", unit[0])
+            pieces.append(piece)
+            starts[unit] = (pts.index.min(), first_new - start)
+        computed = compute_metrics(pd.concat(pieces, ignore_index=True))
+        for unit, part in computed.groupby(UNIT, observed=True, sort=False):
+            first_week, skip = starts[unit]
+            fresh = part.set_index("Week")[POINT_COLUMNS].iloc[skip:]
+            fresh = fresh.astype({"Score Sum": float, "Entries": int})
+            old = self.partitions.get(unit)
+            self.partitions[unit] = fresh if old is None else pd.concat([old[old.index < first_week], fresh])
+        self._latest = None
+
+    # ---------- reads ----------
+    def unit(self, directorate, department):
+        """Week-indexed trend frame for one unit, or None if it has no scores."""
+        self._materialize()
+        return self.partitions.get((directorate, department))
+
+    def latest(self):
+        """One row per unit with the metrics of its most recent week."""
+        self._materialize()
+        if self._latest is None:
+            rows = [
+                {"Directorate": unit[0], "Department": unit[1], "Week": part.index[-1], **part.iloc[-1].to_dict()}
+                for unit, part in self.partitions.items()
+            ]
+            self._latest = pd.DataFrame(rows, columns=UNIT + ["Week"] + POINT_COLUMNS)
+        return self._latest
+
+    def flagged(self):
+        """Units whose latest week is flagged as underperforming, worst first."""
+        latest = self.latest()
+        flagged = latest[latest["Underperforming"].astype(bool)]
+        return flagged.sort_values("Z-Score")[UNIT + ["Week", "Score", "Rolling Mean", "WoW Delta", "Z-Score"]]